@@ -1,26 +1,180 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import requests
+import numpy as np
+import base64
+import bisect
+import csv
+import functools
+import gzip
+import hashlib
+import hmac
+import io
 import json
 import os
-from datetime import datetime, timedelta
+import queue
+import sqlite3
+import sys
+import tempfile
+from datetime import date as date_type, datetime, timedelta, timezone
 import time
+import zlib
+import heapq
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent_monkey = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-# In-memory data storage
-events = {}
-weather_cache = {}
-event_counter = 1
+# Event listing configuration
+EVENTS_PAGE_SIZE = int(os.getenv('EVENTS_PAGE_SIZE', '50'))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv('EVENTS_MAX_PAGE_SIZE', '500'))
+EVENTS_MAX_SCAN_PAGES = int(os.getenv('EVENTS_MAX_SCAN_PAGES', '5'))  # Pages of rows a min_rating list may score per request
+RATING_ORDER = {'Poor': 0, 'Okay': 1, 'Good': 2}
+
+# Bulk import/export configuration
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '500'))
+BULK_MAX_ERRORS = int(os.getenv('BULK_MAX_ERRORS', '100'))  # Row errors reported per import
+EXPORT_WEATHER_DEADLINE = float(os.getenv('EXPORT_WEATHER_DEADLINE', '60'))  # Seconds an export page waits for forecasts
+EXPORT_CSV_COLUMNS = [
+    'id', 'name', 'location', 'date', 'event_type', 'created_at', 'updated_at',
+    'temperature', 'description', 'score', 'max_score', 'percentage', 'rating'
+]
+
+# Event storage configuration
+EVENT_STORE_BACKEND = os.getenv('EVENT_STORE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+EVENT_STORE_PATH = os.getenv(
+    'EVENT_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.db')
+)
 
 # OpenWeatherMap API configuration
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '1a6b02cacdb153159a4e82b8e8f8a3c7')
-OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5"
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5")
+OPENWEATHER_GEO_URL = os.getenv('OPENWEATHER_GEO_URL', "http://api.openweathermap.org/geo/1.0")
+OPENWEATHER_TIMEOUT = float(os.getenv('OPENWEATHER_TIMEOUT', '10'))
+
+# Location resolution: 'openweather' geocodes to coordinates, 'local' keys on the normalized name
+LOCATION_RESOLVER = os.getenv('LOCATION_RESOLVER', 'openweather')
+GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', str(30 * 86400)))
+
+# Share forecasts between places in the same geohash cell (5 is roughly 5x5 km); 0 disables
+FORECAST_GRID_PRECISION = int(os.getenv('FORECAST_GRID_PRECISION', '0'))
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+SPATIAL_INDEX_MAX_ENTRIES = int(os.getenv('SPATIAL_INDEX_MAX_ENTRIES', '10000'))  # Location spellings remembered per worker
+
+# Upstream HTTP client configuration
+OPENWEATHER_POOL_SIZE = int(os.getenv('OPENWEATHER_POOL_SIZE', '10'))
+OPENWEATHER_MAX_RETRIES = int(os.getenv('OPENWEATHER_MAX_RETRIES', '2'))
+OPENWEATHER_RETRY_BACKOFF = float(os.getenv('OPENWEATHER_RETRY_BACKOFF', '0.5'))
+OPENWEATHER_CALLS_PER_MINUTE = float(os.getenv('OPENWEATHER_CALLS_PER_MINUTE', '60'))  # Free plan quota, retries included
+OPENWEATHER_BURST = int(os.getenv('OPENWEATHER_BURST', '10'))
+SERVER_WORKERS = max(int(os.getenv('WEB_CONCURRENCY', '1')), 1)  # gunicorn workers sharing the quota
+
+# Upstream circuit breaker configuration
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '20'))
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '5'))
+CIRCUIT_COOLDOWN = int(os.getenv('CIRCUIT_COOLDOWN', '30'))
+
+# How long failed lookups are remembered, per upstream error class (seconds)
+NEGATIVE_CACHE_TTLS = {
+    'not_found': 600,       # Unknown city
+    'unauthorized': 60,     # Bad or revoked API key
+    'rate_limited': 60,     # Plan quota exhausted
+    'server_error': 30,     # OpenWeatherMap 5xx
+    'unavailable': 30       # Timeouts and connection errors
+}
+
+# Weather cache configuration
+WEATHER_CACHE_BACKEND = os.getenv('WEATHER_CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+WEATHER_CACHE_PATH = os.getenv(
+    'WEATHER_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_cache.db')
+)
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '21600'))  # 6 hours cache
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', '1000'))
+WEATHER_CACHE_MAX_BYTES = int(os.getenv('WEATHER_CACHE_MAX_BYTES', '0'))  # 0 disables the memory cap
+WEATHER_CACHE_PURGE_INTERVAL = int(os.getenv('WEATHER_CACHE_PURGE_INTERVAL', '300'))
+WEATHER_STALE_TTL = int(os.getenv('WEATHER_STALE_TTL', '21600'))  # Serve stale data this long past expiry
+
+# Background forecast refresh configuration
+WEATHER_REFRESH_WORKERS = int(os.getenv('WEATHER_REFRESH_WORKERS', '2'))
+WEATHER_REFRESH_INTERVAL = int(os.getenv('WEATHER_REFRESH_INTERVAL', '0'))  # 0 disables the scheduler
+WEATHER_REFRESH_AHEAD = int(os.getenv('WEATHER_REFRESH_AHEAD', '1800'))
+refresh_executor = ThreadPoolExecutor(max_workers=WEATHER_REFRESH_WORKERS)
+
+# Cooperative serving: gunicorn's gevent worker patches the stdlib before importing the app,
+# so requests, threads and sleeps below become greenlets waiting on one event loop
+GEVENT_ACTIVE = gevent_monkey is not None and gevent_monkey.is_module_patched('socket')
+
+# Concurrent weather fan-out configuration
+WEATHER_FANOUT_WORKERS = int(os.getenv('WEATHER_FANOUT_WORKERS', '200' if GEVENT_ACTIVE else '8'))
+WEATHER_FANOUT_DEADLINE = float(os.getenv('WEATHER_FANOUT_DEADLINE', '5'))
+weather_executor = ThreadPoolExecutor(max_workers=WEATHER_FANOUT_WORKERS)
+
+# Alternative time window search configuration
+ALTERNATIVE_DAYS = int(os.getenv('ALTERNATIVE_DAYS', '3'))  # Days either side of the event date
+ALTERNATIVE_WINDOW_SLOTS = int(os.getenv('ALTERNATIVE_WINDOW_SLOTS', '2'))  # 3-hour slots per window
+ALTERNATIVE_RESULTS = int(os.getenv('ALTERNATIVE_RESULTS', '5'))
+FORECAST_SLOT_SECONDS = 10800
+
+# Response encoding configuration
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')  # 'auto' uses orjson when installed, or 'stdlib'
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))  # Smaller buffered bodies are sent as is
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+COMPRESSIBLE_MIMETYPES = (
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain',
+    'text/css', 'text/javascript', 'application/javascript'
+)
+EVENTS_STREAM_CHUNK = int(os.getenv('EVENTS_STREAM_CHUNK', '50'))  # Events serialized per streamed chunk
+
+# Per-request profiling; PROFILE_TOKEN must be set (and sent by the caller) to enable it
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'smart_event_planner_profiles'))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.001'))
+PROFILE_PHASES = ('cache', 'upstream', 'parse', 'score', 'serialize')
+
+# Rating change alert configuration
+ALERT_LOG_BACKEND = os.getenv('ALERT_LOG_BACKEND', EVENT_STORE_BACKEND)  # 'memory' or 'sqlite'
+ALERT_HISTORY = int(os.getenv('ALERT_HISTORY', '1000'))  # Alerts kept for clients to catch up on
+ALERT_STREAM_TIMEOUT = int(os.getenv('ALERT_STREAM_TIMEOUT', '300' if GEVENT_ACTIVE else '0'))  # 0 sends the backlog and closes
+ALERT_STREAM_RETRY = int(os.getenv('ALERT_STREAM_RETRY', '15000'))  # Milliseconds before SSE clients reconnect
+ALERT_HEARTBEAT = 15
+ALERT_POLL_INTERVAL = float(os.getenv('ALERT_POLL_INTERVAL', '1'))  # How often streams check the shared SQLite log
+ALERT_WEBHOOK_URLS = [url.strip() for url in os.getenv('ALERT_WEBHOOK_URLS', '').split(',') if url.strip()]
+ALERT_WEBHOOK_QUEUE_SIZE = int(os.getenv('ALERT_WEBHOOK_QUEUE_SIZE', '1000'))
+ALERT_WEBHOOK_RETRIES = int(os.getenv('ALERT_WEBHOOK_RETRIES', '3'))
+ALERT_WEBHOOK_TIMEOUT = float(os.getenv('ALERT_WEBHOOK_TIMEOUT', '5'))
+
+# Local hours (start inclusive, end exclusive) counted as daytime in day summaries
+DAYTIME_START_HOUR = 6
+DAYTIME_END_HOUR = 18
+
+# Marker for weather that did not resolve before the fan-out deadline
+WEATHER_PENDING = 'pending'
 
 # Event type weather preferences with new scoring system
 EVENT_WEATHER_PREFERENCES = {
@@ -152,552 +306,3046 @@ EVENT_WEATHER_PREFERENCES = {
     }
 }
 
-def get_weather_data(location, date=None):
-    """Fetch weather data from OpenWeatherMap API"""
-    cache_key = f"{location}_{date}" if date else location
+# Histogram buckets in seconds: requests and lookups range from cache hits to slow upstream
+# calls, scoring one event takes microseconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SCORING_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05)
+
+METRICS = []
+
+def format_metric_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class Metric:
+    """One Prometheus metric family with optional labels, rendered in the text format
+
+    Values live in this process, so each gunicorn worker reports its own and
+    every sample carries a 'worker' label with the process id. A scrape lands
+    on one worker, and the label keeps each worker's counters a separate
+    series instead of one that jumps between unrelated values.
+    """
     
-    # Check cache first
-    if cache_key in weather_cache:
-        cached_data = weather_cache[cache_key]
-        if time.time() - cached_data['timestamp'] < 21600:  # 6 hours cache
-            return cached_data['data']
+    kind = 'untyped'
     
-    try:
-        if date:
-            # Get 5-day forecast
-            url = f"{OPENWEATHER_BASE_URL}/forecast"
-            params = {
-                'q': location,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params, timeout=10)
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        METRICS.append(self)
+    
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+    
+    def set(self, value, **labels):
+        """Set the value outright, e.g. from a total kept elsewhere"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+    
+    def render(self):
+        with self.lock:
+            samples = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        label_names = ('worker',) + self.label_names
+        worker = (str(os.getpid()),)
+        for key, value in samples:
+            lines.append(f"{self.name}{format_metric_labels(label_names, worker + key)} {value}")
+        return lines
+
+class MetricCounter(Metric):
+    kind = 'counter'
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class MetricGauge(MetricCounter):
+    kind = 'gauge'
+    
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class MetricHistogram(Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value, **labels):
+        self.bind(**labels)(value)
+    
+    def bind(self, **labels):
+        """Return an observe(value) function for fixed label values, cheap enough for hot paths"""
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+        counts = state[0]
+        buckets = self.buckets
+        lock = self.lock
+        
+        def observe(value):
+            index = bisect.bisect_left(buckets, value)
+            with lock:
+                counts[index] += 1
+                state[1] += value
+        return observe
+    
+    def render(self):
+        with self.lock:
+            samples = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        label_names = ('worker',) + self.label_names
+        worker = (str(os.getpid()),)
+        for key, (counts, total) in samples:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = format_metric_labels(label_names + ('le',), worker + key + (str(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_metric_labels(label_names, worker + key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def timed(histogram, **labels):
+    """Decorator recording how long each call takes in a histogram"""
+    observe = histogram.bind(**labels)
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+# Server-Timing phase totals of the request being profiled on this thread, if any.
+# Fan-out threads working for a profiled request share its totals, hence the lock.
+request_phases = threading.local()
+request_phases_lock = threading.Lock()
+
+def add_phase_time(totals, name, seconds):
+    with request_phases_lock:
+        totals[name] = totals.get(name, 0.0) + seconds
+
+def record_phase(name, seconds):
+    """Add time to a phase of the profiled request; a no-op for everything else"""
+    totals = getattr(request_phases, 'totals', None)
+    if totals is not None:
+        add_phase_time(totals, name, seconds)
+
+def timed_phase(name):
+    """Decorator charging each call's duration to a Server-Timing phase of a profiled request"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            totals = getattr(request_phases, 'totals', None)
+            if totals is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_phase_time(totals, name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def frame_stack(frame):
+    """Labels of a frame and its callers, outermost first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+class StackProfiler:
+    """Collapsed-stack profile of one thread, readable by flamegraph.pl and speedscope
+
+    'deterministic' hooks every call with sys.setprofile and charges wall time
+    (in microseconds) to the exact stack. 'sampled' has a helper thread read
+    the stack every PROFILE_SAMPLE_INTERVAL and counts samples, which slows a
+    CPU-heavy request far less. Work on other threads is not included.
+    """
+    
+    def __init__(self, mode='deterministic'):
+        self.mode = mode
+        self.stacks = Counter()
+        self.thread_id = threading.get_ident()
+        self.running = False
+    
+    def start(self):
+        self.running = True
+        if self.mode == 'sampled':
+            self.sampler = threading.Thread(target=self._sample, name='request-profiler', daemon=True)
+            self.sampler.start()
+            return
+        
+        # Seed the stack with the frames already running, down to this one, so returns pop them
+        self.stack = [(label, False) for label in frame_stack(sys._getframe())]
+        self.last = time.perf_counter()
+        sys.setprofile(self._trace)
+    
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self.mode == 'sampled':
+            self.sampler.join()
         else:
-            # Get current weather
-            url = f"{OPENWEATHER_BASE_URL}/weather"
-            params = {
-                'q': location,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
+            sys.setprofile(None)
+            self._charge()
+    
+    def _charge(self):
+        now = time.perf_counter()
+        self.stacks[tuple(label for label, _ in self.stack)] += (now - self.last) * 1e6
+        self.last = now
+    
+    def _trace(self, frame, event, arg):
+        self._charge()
+        if event == 'call':
+            self.stack.append((frame_label(frame.f_code), False))
+        elif event == 'c_call':
+            self.stack.append((f"{getattr(arg, '__qualname__', arg)} (builtin)", True))
+        elif self.stack and self.stack[-1][1] == event.startswith('c_'):
+            self.stack.pop()
+    
+    def _sample(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[tuple(frame_stack(frame))] += 1
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+    
+    def write(self, path):
+        """Write the profile as 'outer;inner;leaf value' lines"""
+        with open(path, 'w') as f:
+            for stack, value in self.stacks.most_common():
+                if stack and round(value):
+                    f.write(f"{';'.join(stack)} {round(value)}\n")
+
+class PhaseTimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with encoding time charged to the serialize phase
+
+    When orjson is in use, compact output (everything outside debug mode)
+    is encoded by it with the same sorted keys; dates and dataclasses still
+    go through Flask's default hook, and whatever orjson rejects falls back
+    to the stdlib encoder.
+    """
+    
+    use_orjson = orjson is not None and JSON_ENCODER in ('auto', 'orjson')
+    
+    @timed_phase('serialize')
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and 'indent' not in kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=(
+                    orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                )).decode()
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+app.json = PhaseTimedJSONProvider(app)
+
+HTTP_REQUESTS = MetricCounter('http_requests_total', 'HTTP requests handled', ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = MetricHistogram('http_request_duration_seconds', 'Time to build the HTTP response', ('route', 'method'))
+HTTP_IN_FLIGHT = MetricGauge('http_requests_in_flight', 'HTTP requests being handled', ('route',))
+UPSTREAM_REQUESTS = MetricCounter('upstream_requests_total', 'OpenWeatherMap calls by outcome', ('endpoint', 'status'))
+UPSTREAM_REQUEST_SECONDS = MetricHistogram('upstream_request_duration_seconds', 'OpenWeatherMap call latency', ('endpoint',))
+UPSTREAM_FAILURES = MetricCounter('upstream_failures_total', 'Failed lookups by error class', ('endpoint', 'error_class'))
+UPSTREAM_CIRCUIT_OPEN = MetricGauge('upstream_circuit_open', '1 while the OpenWeatherMap circuit is open or half open')
+WEATHER_LOOKUP_SECONDS = MetricHistogram('weather_lookup_duration_seconds', 'get_weather_data time, cache hits and misses alike')
+SCORING_SECONDS = MetricHistogram('suitability_scoring_duration_seconds', 'Suitability scoring time', ('scorer',), SCORING_BUCKETS)
+CACHE_HITS = MetricCounter('cache_hits_total', 'Cache hits', ('cache',))
+CACHE_MISSES = MetricCounter('cache_misses_total', 'Cache misses', ('cache',))
+CACHE_EVICTIONS = MetricCounter('cache_evictions_total', 'Entries evicted to stay within size caps', ('cache',))
+CACHE_EXPIRATIONS = MetricCounter('cache_expirations_total', 'Entries dropped after their TTL', ('cache',))
+CACHE_ENTRIES = MetricGauge('cache_entries', 'Entries currently cached', ('cache',))
+COALESCED_REQUESTS = MetricCounter('weather_coalesced_requests_total', 'Lookups that joined an in-flight fetch')
+SCORED_EVENTS = MetricGauge('materialized_scores', 'Events with a materialized suitability score')
+
+class CacheBackend:
+    """Interface shared by the weather cache backends
+
+    Values are whatever the weather layer stores (parsed forecasts, current
+    weather dicts); backends decide how to keep and expire them.
+    """
+    
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired"""
+        raise NotImplementedError
+    
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (the backend default when None)"""
+        raise NotImplementedError
+    
+    def delete(self, key):
+        """Drop key from the cache if present"""
+        raise NotImplementedError
+    
+    def purge(self):
+        """Remove every expired entry now and return how many were removed"""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Remove every entry, expired or not"""
+        raise NotImplementedError
+    
+    def stats(self):
+        """Return size and hit/miss/eviction counters"""
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """Thread-safe LRU cache with per-entry TTL, size caps and hit/miss/eviction counters
+
+    Expired entries are dropped lazily when read and by a periodic purge that
+    runs on writes at most once per purge_interval seconds.
+    """
+    
+    def __init__(self, ttl, max_entries, max_bytes=0, purge_interval=300):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.purge_interval = purge_interval
+        self.entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.total_bytes = 0
+        self.last_purge = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+    
+    @timed_phase('cache')
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
             
-            # Transform data to internal format
-            if date:
-                # Find the forecast for the specific date
-                target_date = datetime.strptime(date, '%Y-%m-%d').date()
-                for item in data.get('list', []):
-                    item_date = datetime.fromtimestamp(item['dt']).date()
-                    if item_date == target_date:
-                        weather_info = {
-                            'temperature': round(item['main']['temp'], 1),
-                            'humidity': round(item['main']['humidity']),
-                            'wind_speed': round(item['wind']['speed'], 1),
-                            'description': item['weather'][0]['description'],
-                            'precipitation': round(item.get('rain', {}).get('3h', 0) / 3, 1) if 'rain' in item else 0.0,
-                            'icon': item['weather'][0]['icon']
-                        }
-                        break
-                else:
-                    weather_info = {
-                        'temperature': round(data['list'][0]['main']['temp'], 1),
-                        'humidity': round(data['list'][0]['main']['humidity']),
-                        'wind_speed': round(data['list'][0]['wind']['speed'], 1),
-                        'description': data['list'][0]['weather'][0]['description'],
-                        'precipitation': 0.0,
-                        'icon': data['list'][0]['weather'][0]['icon']
-                    }
-            else:
-                weather_info = {
-                    'temperature': round(data['main']['temp'], 1),
-                    'humidity': round(data['main']['humidity']),
-                    'wind_speed': round(data['wind']['speed'], 1),
-                    'description': data['weather'][0]['description'],
-                    'precipitation': 0.0,
-                    'icon': data['weather'][0]['icon']
-                }
+            if entry[1] <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
             
-            # Cache the result
-            weather_cache[cache_key] = {
-                'data': weather_info,
-                'timestamp': time.time()
-            }
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    @timed_phase('cache')
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting least recently used entries past the caps"""
+        size = len(json.dumps(value, default=str)) if self.max_bytes else 0
+        
+        with self.lock:
+            now = time.time()
+            if key in self.entries:
+                self._remove(key)
             
-            return weather_info
-        else:
-            return None
+            self.entries[key] = (value, now + (self.ttl if ttl is None else ttl), size)
+            self.total_bytes += size
             
-    except Exception as e:
-        print(f"Weather API error: {e}")
-        return None
+            if now - self.last_purge >= self.purge_interval:
+                self._purge_expired(now)
+            
+            while self.entries and (
+                len(self.entries) > self.max_entries
+                or (self.max_bytes and self.total_bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+    
+    def delete(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+    
+    def purge(self):
+        with self.lock:
+            return self._purge_expired(time.time())
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+    
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.total_bytes -= size
+    
+    def _purge_expired(self, now):
+        expired = [key for key, entry in self.entries.items() if entry[1] <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self.last_purge = now
+        return len(expired)
 
-def calculate_suitability_score(event_type, weather_data):
-    """Calculate weather suitability score for an event type using new algorithm"""
-    if not weather_data or event_type not in EVENT_WEATHER_PREFERENCES:
-        return {"score": 0, "rating": "Poor", "details": {}}
+def connection_local():
+    """Per-thread storage for sqlite3 connections
+
+    Under gevent, threading.local is per greenlet, which would open one
+    connection per request; greenlets never switch inside a sqlite3 call, so
+    they can share their OS thread's connection instead.
+    """
+    if GEVENT_ACTIVE:
+        return gevent_monkey.get_original('threading', 'local')()
+    return threading.local()
+
+def open_sqlite(path):
+    """Open a SQLite connection tuned for many readers and one writer across processes"""
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+def local_connection(local, path, schema):
+    """Return the calling thread's connection to path, opening it and applying schema on first use
+
+    sqlite3 connections must not cross threads or forked workers, so each one
+    is kept in local (from connection_local) with the pid that opened it.
+    schema entries are SQL statements, or callables taking the connection for
+    steps SQL alone cannot express.
+    """
+    conn = getattr(local, 'conn', None)
+    if conn is None or local.pid != os.getpid():
+        conn = open_sqlite(path)
+        for statement in schema:
+            if callable(statement):
+                statement(conn)
+            else:
+                conn.execute(statement)
+        local.conn = conn
+        local.pid = os.getpid()
+    return conn
+
+def encode_cache_value(value):
+    """Serialize a cache entry as JSON, tagging dates and datetimes so they round-trip"""
+    def default(obj):
+        if isinstance(obj, datetime):
+            return {'__datetime__': obj.isoformat()}
+        if isinstance(obj, date_type):
+            return {'__date__': obj.isoformat()}
+        raise TypeError(f"Cannot cache {type(obj).__name__} values")
+    return json.dumps(value, default=default, separators=(',', ':'))
+
+def decode_cache_value(data):
+    """Rebuild a cache entry serialized by encode_cache_value"""
+    def object_hook(obj):
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date_type.fromisoformat(obj['__date__'])
+        return obj
+    return json.loads(data, object_hook=object_hook)
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache shared by every worker process on a node
+
+    Entries live in a WAL-mode SQLite file, so all gunicorn workers read the
+    same forecasts and the cache survives restarts. Several caches can share
+    one file under different namespaces. When full, the oldest stored entries
+    are evicted first. Hit/miss counters are per process.
+
+    Values are stored as JSON rather than pickled, so a tampered cache file
+    can at worst corrupt entries, never run code; rows that do not decode
+    (such as those written by older versions) count as misses.
+    """
     
-    prefs = EVENT_WEATHER_PREFERENCES[event_type]
-    temp = weather_data['temperature']
-    wind = weather_data['wind_speed']
-    precip = weather_data['precipitation']
-    humidity = weather_data.get('humidity', 50)  # Default if not available
-    description = weather_data['description'].lower()
+    def __init__(self, path, namespace, ttl, max_entries, purge_interval=300):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self.last_purge = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.local = connection_local()
+        self.lock = threading.Lock()
     
-    score = 0
-    details = {}
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS weather_cache ('
+        'namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, '
+        'expires_at REAL NOT NULL, stored_at REAL NOT NULL, '
+        'PRIMARY KEY (namespace, key))',
+        'CREATE INDEX IF NOT EXISTS idx_weather_cache_stored ON weather_cache (namespace, stored_at)'
+    )
     
-    # Convert wind from m/s to km/h for scoring
-    wind_kmh = wind * 3.6
-    
-    if event_type == 'sports':
-        # Sports Event Scoring
-        # Temperature scoring
-        temp_config = prefs['scoring']['temperature']
-        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
-            temp_points = temp_config['max_points']
-            temp_status = 'Ideal'
-        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
-            temp_points = temp_config['acceptable_points']
-            temp_status = 'Acceptable'
-        else:
-            temp_points = 0
-            temp_status = 'Poor'
-        
-        score += temp_points
-        details['temperature'] = {
-            'value': temp,
-            'points': temp_points,
-            'status': temp_status
-        }
-        
-        # Precipitation scoring (convert mm to percentage chance)
-        precip_chance = min(precip * 100, 100)  # Convert mm to percentage
-        precip_config = prefs['scoring']['precipitation']
-        if precip_chance <= precip_config['ideal_max']:
-            precip_points = precip_config['max_points']
-            precip_status = 'Ideal'
-        elif precip_chance <= precip_config['acceptable_max']:
-            precip_points = precip_config['acceptable_points']
-            precip_status = 'Acceptable'
-        else:
-            precip_points = 0
-            precip_status = 'Poor'
-        
-        score += precip_points
-        details['precipitation'] = {
-            'value': precip,
-            'points': precip_points,
-            'status': precip_status
-        }
-        
-        # Wind scoring
-        wind_config = prefs['scoring']['wind']
-        if wind_kmh <= wind_config['ideal_max']:
-            wind_points = wind_config['max_points']
-            wind_status = 'Ideal'
-        elif wind_kmh <= wind_config['acceptable_max']:
-            wind_points = wind_config['acceptable_points']
-            wind_status = 'Acceptable'
-        else:
-            wind_points = 0
-            wind_status = 'Poor'
-        
-        score += wind_points
-        details['wind'] = {
-            'value': wind,
-            'points': wind_points,
-            'status': wind_status
-        }
-        
-        # Conditions scoring
-        conditions_config = prefs['scoring']['conditions']
-        conditions_points = 0
-        conditions_status = 'Poor'
-        
-        for condition, points in conditions_config['scores'].items():
-            if condition in description:
-                conditions_points = points
-                conditions_status = condition.title()
-                break
-        
-        score += conditions_points
-        details['conditions'] = {
-            'value': description,
-            'points': conditions_points,
-            'status': conditions_status
-        }
-        
-    elif event_type == 'formal':
-        # Formal Event Scoring
-        # Precipitation scoring (highest priority)
-        precip_chance = min(precip * 100, 100)
-        precip_config = prefs['scoring']['precipitation']
-        if precip_chance <= precip_config['ideal_max']:
-            precip_points = precip_config['max_points']
-            precip_status = 'Ideal'
-        elif precip_chance <= precip_config['acceptable_max']:
-            precip_points = precip_config['acceptable_points']
-            precip_status = 'Acceptable'
-        else:
-            precip_points = 0
-            precip_status = 'Poor'
-        
-        score += precip_points
-        details['precipitation'] = {
-            'value': precip,
-            'points': precip_points,
-            'status': precip_status
-        }
-        
-        # Temperature scoring
-        temp_config = prefs['scoring']['temperature']
-        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
-            temp_points = temp_config['max_points']
-            temp_status = 'Ideal'
-        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
-            temp_points = temp_config['acceptable_points']
-            temp_status = 'Acceptable'
-        else:
-            temp_points = 0
-            temp_status = 'Poor'
-        
-        score += temp_points
-        details['temperature'] = {
-            'value': temp,
-            'points': temp_points,
-            'status': temp_status
-        }
-        
-        # Humidity scoring
-        humidity_config = prefs['scoring']['humidity']
-        if humidity_config['ideal_range'][0] <= humidity <= humidity_config['ideal_range'][1]:
-            humidity_points = humidity_config['max_points']
-            humidity_status = 'Ideal'
-        elif humidity_config['acceptable_range'][0] <= humidity <= humidity_config['acceptable_range'][1]:
-            humidity_points = humidity_config['acceptable_points']
-            humidity_status = 'Acceptable'
-        else:
-            humidity_points = 0
-            humidity_status = 'Poor'
-        
-        score += humidity_points
-        details['humidity'] = {
-            'value': humidity,
-            'points': humidity_points,
-            'status': humidity_status
-        }
-        
-        # Wind scoring
-        wind_config = prefs['scoring']['wind']
-        if wind_kmh <= wind_config['ideal_max']:
-            wind_points = wind_config['max_points']
-            wind_status = 'Ideal'
-        elif wind_kmh <= wind_config['acceptable_max']:
-            wind_points = wind_config['acceptable_points']
-            wind_status = 'Acceptable'
-        else:
-            wind_points = 0
-            wind_status = 'Poor'
-        
-        score += wind_points
-        details['wind'] = {
-            'value': wind,
-            'points': wind_points,
-            'status': wind_status
-        }
-        
-    elif event_type == 'adventure':
-        # Outdoor Adventure Scoring
-        # Temperature scoring
-        temp_config = prefs['scoring']['temperature']
-        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
-            temp_points = temp_config['max_points']
-            temp_status = 'Ideal'
-        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
-            temp_points = temp_config['acceptable_points']
-            temp_status = 'Acceptable'
-        else:
-            temp_points = 0
-            temp_status = 'Poor'
-        
-        score += temp_points
-        details['temperature'] = {
-            'value': temp,
-            'points': temp_points,
-            'status': temp_status
-        }
-        
-        # Precipitation scoring
-        precip_chance = min(precip * 100, 100)
-        precip_config = prefs['scoring']['precipitation']
-        if precip_chance <= precip_config['ideal_max']:
-            precip_points = precip_config['max_points']
-            precip_status = 'Ideal'
-        elif precip_chance <= precip_config['acceptable_max']:
-            precip_points = precip_config['acceptable_points']
-            precip_status = 'Acceptable'
-        else:
-            precip_points = 0
-            precip_status = 'Poor'
-        
-        score += precip_points
-        details['precipitation'] = {
-            'value': precip,
-            'points': precip_points,
-            'status': precip_status
-        }
-        
-        # Visibility scoring (estimated from weather conditions)
-        visibility = 10  # Default good visibility
-        if 'fog' in description or 'mist' in description:
-            visibility = 2
-        elif 'haze' in description:
-            visibility = 5
-        elif 'rain' in description or 'snow' in description:
-            visibility = 7
-        
-        visibility_config = prefs['scoring']['visibility']
-        if visibility >= visibility_config['ideal_min']:
-            visibility_points = visibility_config['max_points']
-            visibility_status = 'Ideal'
-        elif visibility >= visibility_config['acceptable_min']:
-            visibility_points = visibility_config['acceptable_points']
-            visibility_status = 'Acceptable'
-        else:
-            visibility_points = 0
-            visibility_status = 'Poor'
-        
-        score += visibility_points
-        details['visibility'] = {
-            'value': visibility,
-            'points': visibility_points,
-            'status': visibility_status
-        }
-        
-        # Wind scoring
-        wind_config = prefs['scoring']['wind']
-        if wind_config['ideal_range'][0] <= wind_kmh <= wind_config['ideal_range'][1]:
-            wind_points = wind_config['max_points']
-            wind_status = 'Ideal'
-        elif wind_config['acceptable_range'][0] <= wind_kmh <= wind_config['acceptable_range'][1]:
-            wind_points = wind_config['acceptable_points']
-            wind_status = 'Acceptable'
-        else:
-            wind_points = 0
-            wind_status = 'Poor'
-        
-        score += wind_points
-        details['wind'] = {
-            'value': wind,
-            'points': wind_points,
-            'status': wind_status
-        }
-        
-    elif event_type == 'picnic':
-        # Family/Friends Picnic Scoring
-        # Comfort scoring (temperature + humidity consideration)
-        comfort_config = prefs['scoring']['comfort']
-        if comfort_config['ideal_range'][0] <= temp <= comfort_config['ideal_range'][1]:
-            comfort_points = comfort_config['max_points']
-            comfort_status = 'Ideal'
-        elif comfort_config['acceptable_range'][0] <= temp <= comfort_config['acceptable_range'][1]:
-            comfort_points = comfort_config['acceptable_points']
-            comfort_status = 'Acceptable'
-        else:
-            comfort_points = 0
-            comfort_status = 'Poor'
-        
-        score += comfort_points
-        details['comfort'] = {
-            'value': temp,
-            'points': comfort_points,
-            'status': comfort_status
-        }
+    def _connection(self):
+        return local_connection(self.local, self.path, self.SCHEMA)
+    
+    def _count(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+    
+    @timed_phase('cache')
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM weather_cache WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+        
+        if row is None:
+            self._count('misses')
+            return None
         
-        # Precipitation scoring
-        precip_chance = min(precip * 100, 100)
-        precip_config = prefs['scoring']['precipitation']
-        if precip_chance <= precip_config['ideal_max']:
-            precip_points = precip_config['max_points']
-            precip_status = 'Ideal'
-        elif precip_chance <= precip_config['acceptable_max']:
-            precip_points = precip_config['acceptable_points']
-            precip_status = 'Acceptable'
-        else:
-            precip_points = 0
-            precip_status = 'Poor'
-        
-        score += precip_points
-        details['precipitation'] = {
-            'value': precip,
-            'points': precip_points,
-            'status': precip_status
-        }
+        if row[1] <= time.time():
+            self.delete(key)
+            self._count('expirations')
+            self._count('misses')
+            return None
         
-        # UV Index scoring (estimated from weather conditions)
-        uv_index = 3  # Default moderate UV
-        if 'clear' in description and 'sunny' in description:
-            uv_index = 7
-        elif 'clear' in description:
-            uv_index = 5
-        elif 'cloudy' in description or 'overcast' in description:
-            uv_index = 2
-        
-        uv_config = prefs['scoring']['uv_index']
-        if uv_index <= uv_config['ideal_max']:
-            uv_points = uv_config['max_points']
-            uv_status = 'Ideal'
-        elif uv_index <= uv_config['acceptable_max']:
-            uv_points = uv_config['acceptable_points']
-            uv_status = 'Acceptable'
-        else:
-            uv_points = uv_config['high_points']
-            uv_status = 'High'
-        
-        score += uv_points
-        details['uv_index'] = {
-            'value': uv_index,
-            'points': uv_points,
-            'status': uv_status
-        }
+        try:
+            value = decode_cache_value(row[0])
+        except ValueError:
+            self.delete(key)
+            self._count('misses')
+            return None
         
-        # Wind scoring
-        wind_config = prefs['scoring']['wind']
-        if wind_config['ideal_range'][0] <= wind_kmh <= wind_config['ideal_range'][1]:
-            wind_points = wind_config['max_points']
-            wind_status = 'Ideal'
-        elif wind_config['acceptable_range'][0] <= wind_kmh <= wind_config['acceptable_range'][1]:
-            wind_points = wind_config['acceptable_points']
-            wind_status = 'Acceptable'
-        else:
-            wind_points = 0
-            wind_status = 'Poor'
-        
-        score += wind_points
-        details['wind'] = {
-            'value': wind,
-            'points': wind_points,
-            'status': wind_status
-        }
+        self._count('hits')
+        return value
     
-    # Convert score to rating
-    max_score = prefs['total_max_score']
-    percentage = (score / max_score) * 100
+    @timed_phase('cache')
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO weather_cache (namespace, key, value, expires_at, stored_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (self.namespace, key, encode_cache_value(value), now + (self.ttl if ttl is None else ttl), now)
+        )
+        
+        if now - self.last_purge >= self.purge_interval:
+            self.purge()
+        
+        overflow = conn.execute(
+            'SELECT COUNT(*) FROM weather_cache WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                'DELETE FROM weather_cache WHERE namespace = ? AND key IN ('
+                'SELECT key FROM weather_cache WHERE namespace = ? ORDER BY stored_at LIMIT ?)',
+                (self.namespace, self.namespace, overflow)
+            )
+            self._count('evictions', overflow)
     
-    if percentage >= 85:
-        rating = "Good"
-    elif percentage >= 65:
-        rating = "Okay"
-    else:
-        rating = "Poor"
+    def delete(self, key):
+        self._connection().execute(
+            'DELETE FROM weather_cache WHERE namespace = ? AND key = ?', (self.namespace, key)
+        )
     
-    return {
-        "score": score,
-        "max_score": max_score,
-        "percentage": round(percentage, 1),
-        "rating": rating,
-        "details": details
-    }
+    def purge(self):
+        now = time.time()
+        removed = self._connection().execute(
+            'DELETE FROM weather_cache WHERE namespace = ? AND expires_at <= ?', (self.namespace, now)
+        ).rowcount
+        self.last_purge = now
+        self._count('expirations', removed)
+        return removed
+    
+    def clear(self):
+        self._connection().execute('DELETE FROM weather_cache WHERE namespace = ?', (self.namespace,))
+    
+    def stats(self):
+        entries = self._connection().execute(
+            'SELECT COUNT(*) FROM weather_cache WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+        with self.lock:
+            return {
+                'backend': 'sqlite',
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
 
-@app.route('/')
-def index():
-    """Serve the main HTML page"""
-    return render_template('index.html')
+def create_cache(namespace):
+    """Build the configured cache backend for one kind of weather data
 
-@app.route('/api/events', methods=['POST'])
-def create_event():
-    """Create a new event"""
-    global event_counter
+    Entries are kept for the stale window on top of WEATHER_CACHE_TTL so they
+    can still be served while a background refresh runs.
+    """
+    ttl = WEATHER_CACHE_TTL + WEATHER_STALE_TTL
+    if WEATHER_CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(
+            WEATHER_CACHE_PATH, namespace, ttl,
+            WEATHER_CACHE_MAX_ENTRIES, WEATHER_CACHE_PURGE_INTERVAL
+        )
+    if WEATHER_CACHE_BACKEND == 'memory':
+        return MemoryCache(
+            ttl, WEATHER_CACHE_MAX_ENTRIES,
+            WEATHER_CACHE_MAX_BYTES, WEATHER_CACHE_PURGE_INTERVAL
+        )
+    raise ValueError(f"Unknown WEATHER_CACHE_BACKEND: {WEATHER_CACHE_BACKEND}")
+
+weather_cache = create_cache('weather')
+forecast_cache = create_cache('forecast_v2')  # v2: parsed slots with day summaries
+negative_cache = create_cache('negative')
+geocode_cache = create_cache('geocode')
+
+class RateLimiter:
+    """Thread-safe token bucket that keeps upstream calls within the plan quota
+
+    The bucket is per process, so each of the SERVER_WORKERS gunicorn workers
+    gets an equal share of the quota and burst.
+    """
     
-    try:
-        data = request.get_json()
-        required_fields = ['name', 'location', 'date', 'event_type']
-        
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        event_id = event_counter
-        event_counter += 1
-        
-        event = {
-            'id': event_id,
-            'name': data['name'],
-            'location': data['location'],
-            'date': data['date'],
-            'event_type': data['event_type'],
-            'created_at': datetime.now().isoformat()
-        }
-        
-        events[event_id] = event
-        
-        return jsonify({
-            'message': 'Event created successfully',
-            'event': event
-        }), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    def __init__(self, calls_per_minute, burst):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to timeout seconds; return False if none became available"""
+        if self.rate <= 0:  # Quota disabled
+            return True
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_time = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if wait_time > remaining:
+                    return False
+            time.sleep(wait_time)
 
-@app.route('/api/events', methods=['GET'])
-def list_events():
-    """List all events with basic weather info and suitability scores"""
-    try:
-        events_list = []
-        for event in events.values():
-            # Get basic weather info
-            weather_data = get_weather_data(event['location'], event['date'])
-            event_with_weather = event.copy()
+class UpstreamUnavailable(Exception):
+    """Raised when an upstream call is refused locally without touching the network"""
+    
+    def __init__(self, message, error_class):
+        super().__init__(message)
+        self.error_class = error_class
+
+class CircuitBreaker:
+    """Stop calling the upstream API while its recent error rate is too high
+
+    Outcomes of the last `window` calls are tracked. Once at least `min_calls`
+    are recorded and the failure rate reaches `failure_rate` the circuit opens
+    and calls fail fast. After `cooldown` seconds a single trial call is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, failure_rate, window, min_calls, cooldown):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)
+        self.state = 'closed'
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self.lock:
+            if self.state == 'open':
+                if time.time() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = 'half_open'
+                self.trial_in_flight = False
             
-            if weather_data:
-                event_with_weather['weather'] = {
-                    'temperature': weather_data['temperature'],
-                    'description': weather_data['description'],
-                    'icon': weather_data['icon']
-                }
-                # Calculate suitability score
-                suitability = calculate_suitability_score(event['event_type'], weather_data)
-                event_with_weather['suitability'] = suitability
-            else:
-                event_with_weather['weather'] = None
-                event_with_weather['suitability'] = {
-                    "score": 0,
-                    "max_score": 100,
-                    "percentage": 0,
-                    "rating": "Unknown",
-                    "details": {}
-                }
+            if self.state == 'half_open':
+                if self.trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self.trial_in_flight = True
             
-            events_list.append(event_with_weather)
-        
-        return jsonify({
-            'events': events_list,
-            'count': len(events_list)
-        })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            return True
+    
+    def release(self):
+        """Give back an allowed call that never reached the upstream API"""
+        with self.lock:
+            self.trial_in_flight = False
+    
+    def record(self, success):
+        """Record the outcome of an upstream call"""
+        with self.lock:
+            if self.state == 'half_open':
+                self.trial_in_flight = False
+                if success:
+                    self.state = 'closed'
+                    self.outcomes.clear()
+                else:
+                    self._open()
+                return
+            
+            self.outcomes.append(success)
+            if len(self.outcomes) >= self.min_calls and self._current_failure_rate() >= self.failure_rate:
+                self._open()
+    
+    def snapshot(self):
+        """Return the breaker state for /api/health"""
+        with self.lock:
+            return {
+                'state': self.state,
+                'failure_rate': round(self._current_failure_rate(), 2),
+                'recent_calls': len(self.outcomes),
+                'rejected_calls': self.rejected,
+                'opened_at': datetime.fromtimestamp(self.opened_at).isoformat() if self.opened_at else None
+            }
+    
+    def _current_failure_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+    
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.time()
+        self.outcomes.clear()
 
-@app.route('/api/events/<int:event_id>', methods=['PUT'])
-def update_event(event_id):
-    """Update an event's details"""
+# Shared upstream client, created lazily so each gunicorn worker gets its own pool
+_weather_session = None
+_weather_session_pid = None
+_weather_session_lock = threading.Lock()
+weather_rate_limiter = RateLimiter(
+    OPENWEATHER_CALLS_PER_MINUTE / SERVER_WORKERS, OPENWEATHER_BURST // SERVER_WORKERS
+)
+
+class QuotaRetry(Retry):
+    """urllib3 retry policy whose retries also take a token from the rate limiter
+
+    Every retried request counts against the plan quota, so after the backoff
+    each retry waits for a token like a first attempt does, and gives up
+    with UpstreamUnavailable if none frees up within OPENWEATHER_TIMEOUT.
+    """
+    
+    def sleep(self, response=None):
+        super().sleep(response)
+        if not weather_rate_limiter.acquire(timeout=OPENWEATHER_TIMEOUT):
+            raise UpstreamUnavailable('OpenWeatherMap rate limit exceeded', 'rate_limited')
+weather_circuit = CircuitBreaker(CIRCUIT_FAILURE_RATE, CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_COOLDOWN)
+
+def get_weather_session():
+    """Return this worker's pooled keep-alive session for OpenWeatherMap"""
+    global _weather_session, _weather_session_pid
+    
+    if _weather_session is None or _weather_session_pid != os.getpid():
+        with _weather_session_lock:
+            if _weather_session is None or _weather_session_pid != os.getpid():
+                # A 429 is not retried: waiting out its Retry-After would hold the request
+                # thread, so it goes to the rate_limited negative cache and the breaker instead
+                retry = QuotaRetry(
+                    total=OPENWEATHER_MAX_RETRIES,
+                    backoff_factor=OPENWEATHER_RETRY_BACKOFF,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET']),
+                    respect_retry_after_header=False,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=OPENWEATHER_POOL_SIZE,
+                    pool_maxsize=max(OPENWEATHER_POOL_SIZE, WEATHER_FANOUT_WORKERS),
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _weather_session = session
+                _weather_session_pid = os.getpid()
+    
+    return _weather_session
+
+def classify_upstream_status(status_code):
+    """Map an OpenWeatherMap error status to a negative cache error class"""
+    if status_code == 404:
+        return 'not_found'
+    if status_code == 401:
+        return 'unauthorized'
+    if status_code == 429:
+        return 'rate_limited'
+    if status_code >= 500:
+        return 'server_error'
+    return 'not_found'  # Other 4xx mean the request itself is bad
+
+def fetch_openweather(endpoint, query, base_url=None):
+    """Call an OpenWeatherMap endpoint through the shared, rate-limited client
+
+    query holds the location parameters, e.g. {'q': 'London'} or
+    {'lat': 51.51, 'lon': -0.13}.
+    """
+    if not weather_circuit.allow():
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint, status='circuit_open')
+        raise UpstreamUnavailable('OpenWeatherMap circuit is open', 'circuit_open')
+    
+    if not weather_rate_limiter.acquire(timeout=OPENWEATHER_TIMEOUT):
+        weather_circuit.release()
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint, status='rate_limited')
+        raise UpstreamUnavailable('OpenWeatherMap rate limit exceeded', 'rate_limited')
+    
+    url = f"{base_url or OPENWEATHER_BASE_URL}/{endpoint}"
+    params = {
+        **query,
+        'appid': OPENWEATHER_API_KEY,
+        'units': 'metric'
+    }
+    started = time.perf_counter()
     try:
-        if event_id not in events:
-            return jsonify({'error': 'Event not found'}), 404
-        
+        response = get_weather_session().get(url, params=params, timeout=OPENWEATHER_TIMEOUT)
+    except requests.RequestException:
+        weather_circuit.record(False)
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint, status='error')
+        raise
+    except UpstreamUnavailable:
+        # A retry found no quota left
+        weather_circuit.release()
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint, status='rate_limited')
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        record_phase('upstream', elapsed)
+    UPSTREAM_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    
+    # An unknown city is a healthy answer; auth, quota and server errors are not
+    weather_circuit.record(response.status_code < 500 and response.status_code not in (401, 429))
+    return response
+
+def is_negatively_cached(endpoint, cache_key):
+    """Whether a recent lookup for this location failed and should not be retried yet"""
+    return negative_cache.get(f"{endpoint}:{cache_key}") is not None
+
+def remember_failure(endpoint, cache_key, error_class):
+    """Negative-cache a failed lookup for the TTL of its error class"""
+    UPSTREAM_FAILURES.inc(endpoint=endpoint, error_class=error_class)
+    negative_cache.set(
+        f"{endpoint}:{cache_key}",
+        {'error': error_class, 'failed_at': time.time()},
+        ttl=NEGATIVE_CACHE_TTLS[error_class]
+    )
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight execution
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result (or its exception).
+    """
+    
+    def __init__(self):
+        self.calls = {}
+        self.coalesced = 0
+        self.lock = threading.Lock()
+    
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self.calls[key] = call
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['done'].set()
+
+    def in_flight(self, key):
+        with self.lock:
+            return key in self.calls
+
+weather_flight = SingleFlight()
+
+def is_fresh(entry, max_age=None):
+    """Whether a cached weather entry is younger than max_age (the cache TTL by default)"""
+    if max_age is None:
+        max_age = WEATHER_CACHE_TTL
+    return time.time() - entry['fetched_at'] < max_age
+
+def refresh_in_background(flight_key, fetch):
+    """Run a cache refresh on the refresh pool unless one is already in flight"""
+    if weather_flight.in_flight(flight_key):
+        return
+    
+    def refresh():
+        try:
+            weather_flight.do(flight_key, fetch)
+        except Exception as e:
+            print(f"Weather refresh error: {e}")
+    
+    refresh_executor.submit(refresh)
+
+def get_cached_entry(cache, flight_key, cache_key, fetch):
+    """Read a weather entry with stale-while-revalidate semantics
+
+    Fresh entries are returned as is. Stale entries are returned immediately
+    while a background refresh replaces them. Misses fetch upstream, with
+    concurrent misses coalesced into one call.
+    """
+    entry = cache.get(cache_key)
+    if entry is not None:
+        if not is_fresh(entry):
+            refresh_in_background(flight_key, fetch)
+        return entry
+    
+    return weather_flight.do(flight_key, fetch)
+
+def normalize_location(location):
+    """Normalize a user-typed location so equivalent spellings share a cache entry
+
+    Case, repeated whitespace and spacing around commas are ignored, so
+    "London ,UK" and "london, uk" normalize the same.
+    """
+    parts = (' '.join(part.split()) for part in location.lower().split(','))
+    return ', '.join(part for part in parts if part)
+
+def resolve_location(location, allow_network=True):
+    """Resolve a user-typed location to a canonical place
+
+    Returns a dict with a canonical 'id', display 'name' and the 'query'
+    parameters to send to OpenWeatherMap, or None for an unknown place.
+    With the 'openweather' resolver the id is the geocoded coordinates, so
+    "London", "London,UK" and "London, GB" share one forecast. Resolutions
+    are cached for GEOCODE_CACHE_TTL. With allow_network=False only cached
+    resolutions are returned.
+    """
+    key = normalize_location(location)
+    if not key:
+        return None
+    
+    if LOCATION_RESOLVER == 'local':
+        return local_place(location, key)
+    
+    place = geocode_cache.get(key)
+    if place is not None or not allow_network:
+        return place
+    
+    return weather_flight.do(f"geocode:{key}", lambda: _geocode(location, key))
+
+def local_place(location, key):
+    """Resolve a location by its normalized name only, without geocoding"""
+    return {
+        'id': key,
+        'name': location.strip(),
+        'query': {'q': location}
+    }
+
+def _geocode(location, key):
+    """Geocode a location through OpenWeatherMap and cache the resolution"""
+    place = geocode_cache.get(key)
+    if place is not None:
+        return place
+    
+    if is_negatively_cached('geocode', key):
+        return None
+    
+    try:
+        response = fetch_openweather('direct', {'q': location, 'limit': 1}, base_url=OPENWEATHER_GEO_URL)
+        
+        if response.status_code != 200:
+            error_class = classify_upstream_status(response.status_code)
+            remember_failure('geocode', key, error_class)
+            # Only a definite miss hides the place; otherwise query by name
+            return None if error_class == 'not_found' else local_place(location, key)
+        
+        results = response.json()
+        if not results:
+            remember_failure('geocode', key, 'not_found')
+            return None
+        
+        result = results[0]
+        lat, lon = round(result['lat'], 2), round(result['lon'], 2)
+        place = {
+            'id': f"{lat:.2f},{lon:.2f}",
+            'name': result.get('name', location.strip()),
+            'country': result.get('country'),
+            'lat': lat,
+            'lon': lon,
+            'query': {'lat': lat, 'lon': lon}
+        }
+        geocode_cache.set(key, place, ttl=GEOCODE_CACHE_TTL)
+        
+        return place
+        
+    except Exception as e:
+        print(f"Geocoding error: {e}")
+        return local_place(location, key)
+
+def parse_forecast_slot(item):
+    """Transform one 3-hour forecast item into the internal weather format"""
+    return {
+        'temperature': round(item['main']['temp'], 1),
+        'humidity': round(item['main']['humidity']),
+        'wind_speed': round(item['wind']['speed'], 1),
+        'description': item['weather'][0]['description'],
+        'precipitation': round(item.get('rain', {}).get('3h', 0) / 3, 1) if 'rain' in item else 0.0,
+        'icon': item['weather'][0]['icon']
+    }
+
+def summarize_slots(slots):
+    """Aggregate 3-hour forecast slots into one summary"""
+    weathers = [slot['weather'] for slot in slots]
+    temperatures = [weather['temperature'] for weather in weathers]
+    description = Counter(weather['description'] for weather in weathers).most_common(1)[0][0]
+    return {
+        'temperature_min': min(temperatures),
+        'temperature_max': max(temperatures),
+        'temperature_mean': round(sum(temperatures) / len(temperatures), 1),
+        'humidity_mean': round(sum(weather['humidity'] for weather in weathers) / len(weathers)),
+        'precipitation_total': round(sum(slot['rain_3h'] for slot in slots), 1),
+        'wind_peak': max(weather['wind_speed'] for weather in weathers),
+        'description': description,
+        'icon': next(weather['icon'] for weather in weathers if weather['description'] == description),
+        'slots': len(slots)
+    }
+
+def summarize_day(day_slots):
+    """Build the precomputed summary for one local calendar day
+
+    Holds whole-day and daytime-only aggregates plus the weather used for
+    dated lookups, taken from daytime slots when the day has any.
+    """
+    daytime_slots = [
+        slot for slot in day_slots
+        if DAYTIME_START_HOUR <= slot['local_time'].hour < DAYTIME_END_HOUR
+    ]
+    summary = summarize_slots(day_slots)
+    daytime = summarize_slots(daytime_slots) if daytime_slots else None
+    basis = daytime or summary
+    hours = basis['slots'] * FORECAST_SLOT_SECONDS / 3600
+    return {
+        'summary': summary,
+        'daytime': daytime,
+        'weather': {
+            'temperature': basis['temperature_mean'],
+            'humidity': basis['humidity_mean'],
+            'wind_speed': basis['wind_peak'],
+            'description': basis['description'],
+            'precipitation': round(basis['precipitation_total'] / hours, 1),  # mm per hour
+            'icon': basis['icon']
+        }
+    }
+
+@timed_phase('parse')
+def parse_forecast(data):
+    """Parse a /forecast response once into slots and per-day summaries
+
+    Slot dates and times use the city's UTC offset from the response, not the
+    server's local time. Days are keyed by 'YYYY-MM-DD' for O(1) lookups.
+    """
+    offset = data.get('city', {}).get('timezone', 0)
+    city_tz = timezone(timedelta(seconds=offset))
+    
+    slots = []
+    days = {}
+    for item in data.get('list', []):
+        local_time = datetime.fromtimestamp(item['dt'], city_tz)
+        slot = {
+            'dt': item['dt'],
+            'local_time': local_time,
+            'date': local_time.date(),
+            'rain_3h': item.get('rain', {}).get('3h', 0),
+            'weather': parse_forecast_slot(item)
+        }
+        slots.append(slot)
+        days.setdefault(local_time.strftime('%Y-%m-%d'), []).append(slot)
+    
+    return {
+        'slots': slots,
+        'days': {day: summarize_day(day_slots) for day, day_slots in days.items()},
+        'timezone_offset': offset
+    }
+
+def geohash_encode(lat, lon, precision):
+    """Encode coordinates as a geohash of the given length"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        coord_range, coord = (lon_range, lon) if even else (lat_range, lat)
+        middle = (coord_range[0] + coord_range[1]) / 2
+        value <<= 1
+        if coord >= middle:
+            value |= 1
+            coord_range[0] = middle
+        else:
+            coord_range[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+def geohash_center(cell):
+    """Return the (lat, lon) center of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            coord_range = lon_range if even else lat_range
+            middle = (coord_range[0] + coord_range[1]) / 2
+            if value >> shift & 1:
+                coord_range[0] = middle
+            else:
+                coord_range[1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+class SpatialIndex:
+    """Map normalized locations to the forecast target (place or grid cell) serving them
+
+    Every looked-up spelling is recorded, including one-off locations typed
+    into /api/weather, so the map is an LRU capped at max_entries. A
+    forgotten spelling only costs a cached resolve on its next lookup.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.location_targets = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def add(self, location_key, target_id):
+        with self.lock:
+            self.location_targets[location_key] = target_id
+            self.location_targets.move_to_end(location_key)
+            while len(self.location_targets) > self.max_entries:
+                self.location_targets.popitem(last=False)
+    
+    def target_for(self, location_key):
+        return self.location_targets.get(location_key)
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'locations': len(self.location_targets),
+                'targets': len(set(self.location_targets.values()))
+            }
+
+spatial_index = SpatialIndex(SPATIAL_INDEX_MAX_ENTRIES)
+
+def forecast_target(place):
+    """Return the cache id and query used to fetch weather for a resolved place
+
+    With FORECAST_GRID_PRECISION set, geocoded places snap to their geohash
+    cell and share one forecast fetched for the cell center; otherwise the
+    place is its own target.
+    """
+    if not FORECAST_GRID_PRECISION or 'lat' not in place:
+        return {'id': place['id'], 'query': place['query']}
+    
+    cell = geohash_encode(place['lat'], place['lon'], FORECAST_GRID_PRECISION)
+    lat, lon = geohash_center(cell)
+    return {'id': f"cell:{cell}", 'query': {'lat': round(lat, 4), 'lon': round(lon, 4)}}
+
+def stored_place(location_id, location):
+    """Rebuild the place behind an event's stored location_id without resolving its name
+
+    Geocoded ids are 'lat,lon' and query by coordinates; any other id is a
+    normalized name and queries by the location as typed.
+    """
+    try:
+        lat, lon = (float(part) for part in location_id.split(','))
+    except ValueError:
+        return local_place(location, location_id)
+    return {'id': location_id, 'name': location.strip(), 'lat': lat, 'lon': lon, 'query': {'lat': lat, 'lon': lon}}
+
+def stored_location_id(place):
+    """The location_id to store on an event for a resolved place, if it is final
+
+    A name-only place that the openweather resolver fell back to after a
+    transient geocoding failure is not stored, so the event keeps a NULL id
+    until a later lookup geocodes it and materialize_scores records that.
+    """
+    if place is None or (LOCATION_RESOLVER != 'local' and 'lat' not in place):
+        return None
+    return place['id']
+
+def place_target_id(location_id):
+    """The forecast target id serving a stored canonical place id"""
+    return forecast_target(stored_place(location_id, ''))['id']
+
+def resolve_forecast_target(location, allow_network=True, location_id=None):
+    """Resolve a location to its forecast target and record it in the spatial index
+
+    An event's stored location_id is used as is instead of resolving the name again.
+    """
+    place = stored_place(location_id, location) if location_id else resolve_location(location, allow_network)
+    if place is None:
+        return None
+    
+    target = forecast_target(place)
+    spatial_index.add(normalize_location(location), target['id'])
+    return target
+
+def get_forecast(location, location_id=None):
+    """Fetch the full 5-day forecast for a location, cached once per location
+
+    Returns the parsed forecast: 'slots' with each 3-hour slot's local time and
+    weather, and 'days' with precomputed per-day summaries, so any date inside
+    the forecast window is answered without another upstream call.
+    """
+    target = resolve_forecast_target(location, location_id=location_id)
+    if target is None:
+        return None
+    
+    cache_key = target['id']
+    return get_cached_entry(
+        forecast_cache, f"forecast:{cache_key}", cache_key,
+        lambda: _fetch_forecast(target, cache_key)
+    )
+
+def _fetch_forecast(target, cache_key, max_age=None):
+    """Download, parse and cache the forecast for a location"""
+    # A flight that just finished may already have refreshed the cache
+    entry = forecast_cache.get(cache_key)
+    if entry is not None and is_fresh(entry, max_age):
+        return entry
+    previous = entry
+    
+    if is_negatively_cached('forecast', cache_key):
+        return None
+    
+    try:
+        response = fetch_openweather('forecast', target['query'])
+        
+        if response.status_code != 200:
+            remember_failure('forecast', cache_key, classify_upstream_status(response.status_code))
+            return None
+        
+        entry = parse_forecast(response.json())
+        if not entry['slots']:
+            return None
+        
+        # Cache the parsed forecast
+        entry['fetched_at'] = time.time()
+        forecast_cache.set(cache_key, entry)
+        # Rescoring and alerting scan the event store, so they stay off the request path
+        refresh_executor.submit(on_forecast_refreshed, cache_key, previous, entry)
+        
+        return entry
+        
+    except UpstreamUnavailable as e:
+        print(f"Weather API error: {e}")
+        return None
+    except requests.RequestException as e:
+        print(f"Weather API error: {e}")
+        remember_failure('forecast', cache_key, 'unavailable')
+        return None
+    except Exception as e:
+        print(f"Weather API error: {e}")
+        return None
+
+def get_forecast_for_date(forecast, date):
+    """Look up the weather for a 'YYYY-MM-DD' date in an already parsed forecast"""
+    # Rejects malformed dates and zero-pads ones like 2026-10-5 to match the day keys
+    date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    day = forecast['days'].get(date)
+    if day is not None:
+        return dict(day['weather'])
+    
+    # Outside the forecast window: fall back to the first slot without rain
+    weather_info = dict(forecast['slots'][0]['weather'])
+    weather_info['precipitation'] = 0.0
+    return weather_info
+
+def get_day_summary(location, date):
+    """Return the precomputed whole-day and daytime summaries for a date, if forecast"""
+    forecast = get_forecast(location)
+    try:
+        date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+    if not forecast or date not in forecast['days']:
+        return None
+    day = forecast['days'][date]
+    return {'summary': day['summary'], 'daytime': day['daytime']}
+
+@timed(WEATHER_LOOKUP_SECONDS)
+def get_weather_data(location, date=None, location_id=None):
+    """Fetch weather data from OpenWeatherMap API"""
+    if date:
+        # Dated lookups are sliced out of the cached 5-day forecast
+        forecast = get_forecast(location, location_id)
+        if not forecast:
+            return None
+        try:
+            return get_forecast_for_date(forecast, date)
+        except ValueError as e:
+            print(f"Weather API error: {e}")
+            return None
+    
+    target = resolve_forecast_target(location, location_id=location_id)
+    if target is None:
+        return None
+    
+    cache_key = target['id']
+    entry = get_cached_entry(
+        weather_cache, f"weather:{cache_key}", cache_key,
+        lambda: _fetch_current_weather(target, cache_key)
+    )
+    return entry['data'] if entry else None
+
+def _fetch_current_weather(target, cache_key):
+    """Download and cache the current weather for a location"""
+    entry = weather_cache.get(cache_key)
+    if entry is not None and is_fresh(entry):
+        return entry
+    
+    if is_negatively_cached('weather', cache_key):
+        return None
+    
+    try:
+        # Get current weather
+        response = fetch_openweather('weather', target['query'])
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            # Transform data to internal format
+            weather_info = {
+                'temperature': round(data['main']['temp'], 1),
+                'humidity': round(data['main']['humidity']),
+                'wind_speed': round(data['wind']['speed'], 1),
+                'description': data['weather'][0]['description'],
+                'precipitation': 0.0,
+                'icon': data['weather'][0]['icon']
+            }
+            
+            # Cache the result
+            entry = {
+                'data': weather_info,
+                'fetched_at': time.time()
+            }
+            weather_cache.set(cache_key, entry)
+            
+            return entry
+        else:
+            remember_failure('weather', cache_key, classify_upstream_status(response.status_code))
+            return None
+            
+    except UpstreamUnavailable as e:
+        print(f"Weather API error: {e}")
+        return None
+    except requests.RequestException as e:
+        print(f"Weather API error: {e}")
+        remember_failure('weather', cache_key, 'unavailable')
+        return None
+    except Exception as e:
+        print(f"Weather API error: {e}")
+        return None
+
+def resolve_weather_batch(lookups, deadline=None):
+    """Resolve weather for many (location, date, location_id) lookups concurrently
+
+    Lookups are deduplicated and grouped by forecast target (from the stored
+    location_id, else the spatial index, else the normalized location) so
+    each city or grid cell is fetched once, with the groups fetched in
+    parallel on a bounded thread pool. location_id may be None. Lookups not
+    resolved before the deadline map to WEATHER_PENDING.
+    """
+    if deadline is None:
+        deadline = WEATHER_FANOUT_DEADLINE
+    phase_totals = getattr(request_phases, 'totals', None)
+    
+    groups = {}
+    for lookup in dict.fromkeys(lookups):
+        location, _, location_id = lookup
+        if location_id:
+            group_key = place_target_id(location_id)
+        else:
+            location_key = normalize_location(location)
+            group_key = spatial_index.target_for(location_key) or location_key
+        groups.setdefault(group_key, []).append(lookup)
+    
+    def resolve_group(group):
+        # Charge the pool thread's cache, upstream and parse time to a profiled caller
+        request_phases.totals = phase_totals
+        try:
+            return {
+                lookup: get_weather_data(lookup[0], lookup[1], location_id=lookup[2]) for lookup in group
+            }
+        finally:
+            request_phases.totals = None
+    
+    futures = [weather_executor.submit(resolve_group, group) for group in groups.values()]
+    done, _ = wait(futures, timeout=deadline)
+    
+    results = {lookup: WEATHER_PENDING for lookup in lookups}
+    for future in done:
+        try:
+            results.update(future.result())
+        except Exception as e:
+            print(f"Weather API error: {e}")
+    
+    return results
+
+def refresh_event_forecasts():
+    """Refresh the forecast of every event location that is missing or about to expire"""
+    targets = {}
+    for location, location_id in event_store.locations().values():
+        target = resolve_forecast_target(location, location_id=location_id)
+        if target is not None:
+            targets.setdefault(target['id'], target)
+    
+    max_age = max(WEATHER_CACHE_TTL - WEATHER_REFRESH_AHEAD, 0)
+    refreshed = 0
+    for cache_key, target in targets.items():
+        entry = forecast_cache.get(cache_key)
+        if entry is not None and is_fresh(entry, max_age):
+            continue
+        weather_flight.do(
+            f"forecast:{cache_key}",
+            lambda target=target, cache_key=cache_key: _fetch_forecast(target, cache_key, max_age)
+        )
+        refreshed += 1
+    
+    return refreshed
+
+def _forecast_refresher_loop():
+    while True:
+        time.sleep(WEATHER_REFRESH_INTERVAL)
+        try:
+            refresh_event_forecasts()
+        except Exception as e:
+            print(f"Weather refresh error: {e}")
+
+def start_forecast_refresher():
+    """Start the scheduler that keeps event forecasts warm before they expire"""
+    thread = threading.Thread(target=_forecast_refresher_loop, name='forecast-refresher', daemon=True)
+    thread.start()
+    return thread
+
+# Which weather input each scoring factor reads: (reported value, compared value).
+# A factor config may name another factor's input with an 'input' key.
+FACTOR_INPUTS = {
+    'temperature': ('temperature', 'temperature'),
+    'comfort': ('temperature', 'temperature'),
+    'humidity': ('humidity', 'humidity'),
+    'precipitation': ('precipitation', 'precipitation_chance'),
+    'wind': ('wind_speed', 'wind_kmh'),
+    'visibility': ('visibility', 'visibility'),
+    'uv_index': ('uv_index', 'uv_index'),
+    'conditions': ('description', 'description')
+}
+
+def estimate_visibility(description):
+    """Estimate visibility in km from the weather description"""
+    if 'fog' in description or 'mist' in description:
+        return 2
+    if 'haze' in description:
+        return 5
+    if 'rain' in description or 'snow' in description:
+        return 7
+    return 10  # Default good visibility
+
+def estimate_uv_index(description):
+    """Estimate the UV index from the weather description"""
+    if 'clear' in description and 'sunny' in description:
+        return 7
+    if 'clear' in description:
+        return 5
+    if 'cloudy' in description or 'overcast' in description:
+        return 2
+    return 3  # Default moderate UV
+
+def build_scoring_inputs(weather_data):
+    """Derive every value the scoring factors can read from one weather observation"""
+    description = weather_data['description'].lower()
+    precip = weather_data['precipitation']
+    wind = weather_data['wind_speed']
+    return {
+        'temperature': weather_data['temperature'],
+        'humidity': weather_data.get('humidity', 50),  # Default if not available
+        'precipitation': precip,
+        'precipitation_chance': min(precip * 100, 100),  # Convert mm to percentage
+        'wind_speed': wind,
+        'wind_kmh': wind * 3.6,  # Convert wind from m/s to km/h for scoring
+        'description': description,
+        'visibility': estimate_visibility(description),
+        'uv_index': estimate_uv_index(description)
+    }
+
+def compile_factor(factor, config):
+    """Turn one factor config into a (name, value key, compare key, bands, fallback) tuple
+
+    The comparison kind is inferred from the config keys: 'scores' is a lookup
+    on the description, 'ideal_range' a range check, 'ideal_max' an upper
+    bound and 'ideal_min' a lower bound. bands is an ordered list of
+    (predicate, points, status) and the first band whose predicate holds
+    wins. Values outside every band get fallback: 'high_points' with a 'High'
+    status when configured, otherwise 0/'Poor'. Range predicates only compare
+    and combine with &, so they take a scalar or a NumPy column alike.
+    """
+    value_key, compare_key = FACTOR_INPUTS[config.get('input', factor)]
+    max_points = config.get('max_points', 0)
+    acceptable_points = config.get('acceptable_points', 0)
+    if 'high_points' in config:
+        fallback = (config['high_points'], 'High')
+    else:
+        fallback = (0, 'Poor')
+    
+    if 'scores' in config:
+        bands = [
+            (lambda description, condition=condition: condition in description, points, condition.title())
+            for condition, points in config['scores'].items()
+        ]
+        fallback = (0, 'Poor')
+    
+    elif 'ideal_range' in config:
+        ideal_low, ideal_high = config['ideal_range']
+        acceptable_low, acceptable_high = config['acceptable_range']
+        bands = [
+            (lambda value: (ideal_low <= value) & (value <= ideal_high), max_points, 'Ideal'),
+            (lambda value: (acceptable_low <= value) & (value <= acceptable_high), acceptable_points, 'Acceptable')
+        ]
+    
+    elif 'ideal_max' in config:
+        ideal_max = config['ideal_max']
+        acceptable_max = config['acceptable_max']
+        bands = [
+            (lambda value: value <= ideal_max, max_points, 'Ideal'),
+            (lambda value: value <= acceptable_max, acceptable_points, 'Acceptable')
+        ]
+    
+    elif 'ideal_min' in config:
+        ideal_min = config['ideal_min']
+        acceptable_min = config['acceptable_min']
+        bands = [
+            (lambda value: value >= ideal_min, max_points, 'Ideal'),
+            (lambda value: value >= acceptable_min, acceptable_points, 'Acceptable')
+        ]
+    
+    else:
+        raise ValueError(f"Scoring factor '{factor}' has no ideal_range, ideal_max, ideal_min or scores")
+    
+    return factor, value_key, compare_key, bands, fallback
+
+def evaluate_factor(bands, fallback, value):
+    """Return (points, status) for the first band one compared value falls in"""
+    for predicate, points, status in bands:
+        if predicate(value):
+            return points, status
+    return fallback
+
+def evaluate_factor_column(bands, fallback, column):
+    """Return the points of every row of an input column under the same bands
+
+    Description columns come as (distinct descriptions, row index), so each
+    distinct description is evaluated once.
+    """
+    if isinstance(column, tuple):
+        unique_values, index = column
+        return np.array([evaluate_factor(bands, fallback, value)[0] for value in unique_values], dtype=int)[index]
+    return np.select([predicate(column) for predicate, _, _ in bands], [points for _, points, _ in bands], fallback[0])
+
+def compile_event_scoring(prefs):
+    """Compile an event type's preferences into its max score and flat factor list"""
+    factors = [compile_factor(factor, config) for factor, config in prefs['scoring'].items()]
+    return prefs['total_max_score'], factors
+
+# Scoring configs compiled once at startup; adding an event type is a config change
+COMPILED_SCORING = {
+    event_type: compile_event_scoring(prefs)
+    for event_type, prefs in EVENT_WEATHER_PREFERENCES.items()
+}
+
+def build_scoring_columns(observations):
+    """Derive the scoring inputs for many weather observations at once
+
+    observations maps 'temperature', 'wind_speed', 'precipitation',
+    'description' and optionally 'humidity' to equal-length sequences.
+    Description-derived inputs are computed once per distinct description.
+    """
+    precip = np.asarray(observations['precipitation'], dtype=float)
+    wind = np.asarray(observations['wind_speed'], dtype=float)
+    codes = {}
+    description_index = np.fromiter(
+        (codes.setdefault(str(description).lower(), len(codes)) for description in observations['description']),
+        dtype=np.intp, count=len(precip)
+    )
+    unique_descriptions = list(codes)
+    
+    if 'humidity' in observations:
+        humidity = np.asarray(observations['humidity'], dtype=float)
+    else:
+        humidity = np.full(len(precip), 50.0)  # Default if not available
+    
+    return {
+        'temperature': np.asarray(observations['temperature'], dtype=float),
+        'humidity': humidity,
+        'precipitation': precip,
+        'precipitation_chance': np.minimum(precip * 100, 100),
+        'wind_speed': wind,
+        'wind_kmh': wind * 3.6,
+        'description': (unique_descriptions, description_index),
+        'visibility': np.array([estimate_visibility(d) for d in unique_descriptions])[description_index],
+        'uv_index': np.array([estimate_uv_index(d) for d in unique_descriptions])[description_index]
+    }
+
+@timed(SCORING_SECONDS, scorer='batch')
+@timed_phase('score')
+def score_weather_batch(event_type, observations):
+    """Score many weather observations for one event type in a single NumPy pass
+
+    Returns arrays aligned with the input rows: total 'score', 'percentage'
+    (rounded to one decimal), 'rating', and per-factor 'points'. Totals and
+    ratings match calculate_suitability_score row for row.
+    """
+    columns = build_scoring_columns(observations)
+    rows = len(columns['temperature'])
+    
+    if event_type not in COMPILED_SCORING:
+        return {
+            'score': np.zeros(rows, dtype=int),
+            'percentage': np.zeros(rows),
+            'rating': np.full(rows, 'Poor', dtype=object),
+            'points': {}
+        }
+    
+    max_score, factors = COMPILED_SCORING[event_type]
+    points = {
+        factor: evaluate_factor_column(bands, fallback, columns[compare_key])
+        for factor, _, compare_key, bands, fallback in factors
+    }
+    score = np.sum(list(points.values()), axis=0).astype(int) if points else np.zeros(rows, dtype=int)
+    percentage = (score / max_score) * 100
+    rating = np.where(percentage >= 85, 'Good', np.where(percentage >= 65, 'Okay', 'Poor')).astype(object)
+    
+    return {
+        'score': score,
+        'percentage': np.round(percentage, 1),
+        'rating': rating,
+        'points': points
+    }
+
+def find_best_windows(slots, event_type, event_date, limit=None, window_slots=None):
+    """Find the best upcoming time windows for an event in an already fetched forecast
+
+    Every future slot within ALTERNATIVE_DAYS of the event date is scored once
+    in a batch. Runs of window_slots consecutive slots on the same day form
+    candidate windows, scored by their worst slot, and a top-k heap keeps the
+    best `limit` windows. Returns them best first, earliest first on ties.
+    """
+    if limit is None:
+        limit = ALTERNATIVE_RESULTS
+    if window_slots is None:
+        window_slots = ALTERNATIVE_WINDOW_SLOTS
+    
+    now = time.time()
+    first_day = event_date - timedelta(days=ALTERNATIVE_DAYS)
+    last_day = event_date + timedelta(days=ALTERNATIVE_DAYS)
+    candidates = [
+        slot for slot in slots
+        if slot['dt'] + FORECAST_SLOT_SECONDS > now and first_day <= slot['date'] <= last_day
+    ]
+    if len(candidates) < window_slots:
+        return []
+    
+    scores = score_weather_batch(event_type, {
+        field: [slot['weather'][field] for slot in candidates]
+        for field in ('temperature', 'humidity', 'wind_speed', 'precipitation', 'description')
+    })['score']
+    windows = np.lib.stride_tricks.sliding_window_view(scores, window_slots)
+    window_scores = windows.min(axis=1)
+    worst_offsets = windows.argmin(axis=1)
+    
+    heap = []
+    for start, window_score in enumerate(window_scores.tolist()):
+        first, last = candidates[start], candidates[start + window_slots - 1]
+        if last['date'] != first['date'] or last['dt'] - first['dt'] != (window_slots - 1) * FORECAST_SLOT_SECONDS:
+            continue  # Crosses midnight or a gap in the forecast
+        
+        entry = (window_score, -first['dt'], start)
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    results = []
+    for _, _, start in sorted(heap, reverse=True):
+        first = candidates[start]
+        worst = candidates[start + int(worst_offsets[start])]
+        starts_at = first['local_time']
+        ends_at = starts_at + timedelta(seconds=window_slots * FORECAST_SLOT_SECONDS)
+        results.append({
+            'date': first['date'].strftime('%Y-%m-%d'),
+            'start': starts_at.isoformat(),
+            'end': ends_at.isoformat(),
+            'window': f"{starts_at:%a %H:%M}–{ends_at:%H:%M}",
+            'weather': dict(worst['weather']),
+            'suitability': calculate_suitability_score(event_type, worst['weather'])
+        })
+    
+    return results
+
+def rate_percentage(percentage):
+    """Convert a score percentage to a rating"""
+    if percentage >= 85:
+        return "Good"
+    if percentage >= 65:
+        return "Okay"
+    return "Poor"
+
+@timed(SCORING_SECONDS, scorer='event')
+@timed_phase('score')
+def calculate_suitability_score(event_type, weather_data):
+    """Calculate weather suitability score for an event type using new algorithm"""
+    if not weather_data or event_type not in COMPILED_SCORING:
+        return {"score": 0, "rating": "Poor", "details": {}}
+    
+    max_score, factors = COMPILED_SCORING[event_type]
+    inputs = build_scoring_inputs(weather_data)
+    
+    score = 0
+    details = {}
+    for factor, value_key, compare_key, bands, fallback in factors:
+        points, status = evaluate_factor(bands, fallback, inputs[compare_key])
+        score += points
+        details[factor] = {
+            'value': inputs[value_key],
+            'points': points,
+            'status': status
+        }
+    
+    # Convert score to rating
+    percentage = (score / max_score) * 100
+    
+    return {
+        "score": score,
+        "max_score": max_score,
+        "percentage": round(percentage, 1),
+        "rating": rate_percentage(percentage),
+        "details": details
+    }
+
+class ScoreStore:
+    """Materialized weather and suitability per event, indexed by forecast target
+
+    Each entry remembers the event inputs it was computed from, so a stale
+    entry is recognised as soon as the event row no longer matches it.
+    """
+    
+    def __init__(self):
+        self.entries = {}
+        self.by_target = {}
+        self.lock = threading.Lock()
+    
+    def get(self, event_id):
+        return self.entries.get(event_id)
+    
+    def put(self, event_id, entry):
+        with self.lock:
+            self._remove(event_id)
+            self.entries[event_id] = entry
+            if entry['target'] is not None:
+                self.by_target.setdefault(entry['target'], set()).add(event_id)
+    
+    def discard(self, event_id):
+        with self.lock:
+            self._remove(event_id)
+    
+    def _remove(self, event_id):
+        entry = self.entries.pop(event_id, None)
+        if entry is not None and entry['target'] is not None:
+            event_ids = self.by_target.get(entry['target'])
+            if event_ids is not None:
+                event_ids.discard(event_id)
+                if not event_ids:
+                    del self.by_target[entry['target']]
+    
+    def for_target(self, target_id):
+        with self.lock:
+            return [(event_id, self.entries[event_id]) for event_id in self.by_target.get(target_id, ())]
+    
+    def stats(self):
+        with self.lock:
+            return {'events': len(self.entries), 'targets': len(self.by_target)}
+
+event_scores = ScoreStore()
+
+def score_inputs(event):
+    """The event fields a materialized score depends on"""
+    return (event['location'], event['date'], event['event_type'])
+
+def build_event_score(event_type, weather_data):
+    """Weather summary and suitability for one event, or the placeholder for missing weather"""
+    if weather_data == WEATHER_PENDING or not weather_data:
+        rating = 'Pending' if weather_data == WEATHER_PENDING else 'Unknown'
+        score = {
+            'weather': None,
+            'suitability': {
+                "score": 0,
+                "max_score": 100,
+                "percentage": 0,
+                "rating": rating,
+                "details": {}
+            }
+        }
+        if weather_data == WEATHER_PENDING:
+            score['weather_status'] = WEATHER_PENDING
+        return score
+    
+    return {
+        'weather': {
+            'temperature': weather_data['temperature'],
+            'description': weather_data['description'],
+            'icon': weather_data['icon']
+        },
+        'suitability': calculate_suitability_score(event_type, weather_data)
+    }
+
+def materialize_scores(events_list, deadline=None):
+    """Score events from their forecasts and store the results; returns {event id: score}
+
+    Pending and unknown results are returned but not stored, so they are
+    retried on the next read. Events stored without a location_id (bulk
+    imports of places not yet resolved) get it recorded once their lookup
+    has resolved the place. deadline is passed to resolve_weather_batch.
+    """
+    lookups = {event['id']: (event['location'], event['date'], event['location_id']) for event in events_list}
+    weather_results = resolve_weather_batch(list(lookups.values()), deadline)
+    now = time.time()
+    fetched_at = {}
+    scores = {}
+    resolved_ids = {}
+    for event in events_list:
+        weather_data = weather_results[lookups[event['id']]]
+        score = build_event_score(event['event_type'], weather_data)
+        scores[event['id']] = score
+        if weather_data == WEATHER_PENDING or not weather_data:
+            continue
+        
+        if event['location_id']:
+            target_id = place_target_id(event['location_id'])
+        else:
+            target_id = spatial_index.target_for(normalize_location(event['location']))
+            location_id = stored_location_id(resolve_location(event['location'], allow_network=False))
+            if location_id is not None:
+                resolved_ids[event['id']] = location_id
+        if target_id not in fetched_at:
+            forecast = forecast_cache.get(target_id) if target_id is not None else None
+            fetched_at[target_id] = forecast['fetched_at'] if forecast else now
+        event_scores.put(event['id'], {
+            **score,
+            'inputs': score_inputs(event),
+            'target': target_id,
+            'expires_at': fetched_at[target_id] + WEATHER_CACHE_TTL
+        })
+    
+    if resolved_ids:
+        event_store.set_location_ids(resolved_ids)
+    return scores
+
+def rescore_target(target_id, forecast, previous=None):
+    """Recompute the stored scores of the events served by a freshly fetched forecast
+
+    Given the forecast it replaces, events whose day's weather did not change
+    only have their expiry extended. Scores are per process, so entries whose
+    event another worker deleted or edited are dropped instead.
+    """
+    expires_at = forecast['fetched_at'] + WEATHER_CACHE_TTL
+    entries = event_scores.for_target(target_id)
+    events = event_store.get_many([event_id for event_id, _ in entries])
+    rescored = 0
+    for event_id, entry in entries:
+        event = events.get(event_id)
+        if event is None or score_inputs(event) != entry['inputs']:
+            event_scores.discard(event_id)
+            continue
+        _, date, event_type = entry['inputs']
+        try:
+            weather_data = get_forecast_for_date(forecast, date)
+            unchanged = previous is not None and get_forecast_for_date(previous, date) == weather_data
+        except ValueError:
+            event_scores.discard(event_id)
+            continue
+        if unchanged:
+            event_scores.put(event_id, {**entry, 'expires_at': expires_at})
+            continue
+        event_scores.put(event_id, {
+            **entry,
+            **build_event_score(event_type, weather_data),
+            'expires_at': expires_at
+        })
+        rescored += 1
+    return rescored
+
+class EventStore:
+    """Interface shared by the event storage backends
+
+    Events are plain dicts with id, name, location, date, event_type,
+    location_id (the canonical place id resolved at creation, or None),
+    created_at and, once edited, updated_at. Backends hand out copies.
+    """
+    
+    def create(self, fields):
+        """Store a new event with an allocated id and return it"""
+        raise NotImplementedError
+    
+    def create_many(self, rows):
+        """Store a batch of new events in one write and return how many were stored"""
+        raise NotImplementedError
+    
+    def get(self, event_id):
+        """Return the event with this id, or None"""
+        raise NotImplementedError
+    
+    def get_many(self, event_ids):
+        """Return {event id: event} for those of event_ids that exist"""
+        raise NotImplementedError
+    
+    def list(self, date_from=None, date_to=None, location=None, event_type=None, after_id=None, limit=None,
+             location_id=None):
+        """Return events ordered by id, optionally filtered and keyset-paginated
+
+        date_from/date_to are inclusive 'YYYY-MM-DD' bounds, location matches
+        the normalized location, location_id a canonical place id (or any of a
+        list of them), and only ids greater than after_id are returned.
+        """
+        raise NotImplementedError
+    
+    def update(self, event_id, fields):
+        """Apply fields to an event and return it, or None if it does not exist"""
+        raise NotImplementedError
+    
+    def delete(self, event_id):
+        """Remove an event and return it, or None if it does not exist"""
+        raise NotImplementedError
+    
+    def count(self):
+        """Return the number of stored events"""
+        raise NotImplementedError
+    
+    def locations(self):
+        """Map each normalized event location to (one of its spellings, a stored location_id or None)"""
+        raise NotImplementedError
+    
+    def location_ids(self):
+        """Return the set of distinct location_ids stored on events"""
+        raise NotImplementedError
+    
+    def set_location_ids(self, location_ids):
+        """Record resolved location ids ({event id: location_id}) on events that have none
+
+        Unlike update, this does not mark the events as edited.
+        """
+        raise NotImplementedError
+
+class MemoryEventStore(EventStore):
+    """Per-process event store kept in a dict"""
+    
+    def __init__(self):
+        self.events = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+    
+    def create(self, fields):
+        with self.lock:
+            event = {'id': self.next_id, 'location_id': None, **fields, 'created_at': datetime.now().isoformat()}
+            self.events[event['id']] = event
+            self.next_id += 1
+            return dict(event)
+    
+    def create_many(self, rows):
+        created_at = datetime.now().isoformat()
+        with self.lock:
+            for fields in rows:
+                self.events[self.next_id] = {'id': self.next_id, 'location_id': None, **fields, 'created_at': created_at}
+                self.next_id += 1
+        return len(rows)
+    
+    def get(self, event_id):
+        event = self.events.get(event_id)
+        return dict(event) if event else None
+    
+    def get_many(self, event_ids):
+        with self.lock:
+            return {event_id: dict(self.events[event_id]) for event_id in event_ids if event_id in self.events}
+    
+    def list(self, date_from=None, date_to=None, location=None, event_type=None, after_id=None, limit=None,
+             location_id=None):
+        location_key = normalize_location(location) if location else None
+        if location_id:
+            location_id = {location_id} if isinstance(location_id, str) else set(location_id)
+        results = []
+        with self.lock:
+            # Ids are allocated in increasing order, so insertion order is id order
+            for event_id, event in self.events.items():
+                if after_id is not None and event_id <= after_id:
+                    continue
+                if date_from and event['date'] < date_from:
+                    continue
+                if date_to and event['date'] > date_to:
+                    continue
+                if location_key and normalize_location(event['location']) != location_key:
+                    continue
+                if location_id and event['location_id'] not in location_id:
+                    continue
+                if event_type and event['event_type'] != event_type:
+                    continue
+                results.append(dict(event))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+    
+    def update(self, event_id, fields):
+        with self.lock:
+            event = self.events.get(event_id)
+            if event is None:
+                return None
+            event.update(fields)
+            event['updated_at'] = datetime.now().isoformat()
+            return dict(event)
+    
+    def delete(self, event_id):
+        with self.lock:
+            return self.events.pop(event_id, None)
+    
+    def count(self):
+        return len(self.events)
+    
+    def locations(self):
+        locations = {}
+        for event in self.list():
+            location_key = normalize_location(event['location'])
+            location, location_id = locations.get(location_key, (event['location'], None))
+            locations[location_key] = (location, location_id or event['location_id'])
+        return locations
+    
+    def location_ids(self):
+        with self.lock:
+            return {event['location_id'] for event in self.events.values() if event['location_id'] is not None}
+    
+    def set_location_ids(self, location_ids):
+        with self.lock:
+            for event_id, location_id in location_ids.items():
+                event = self.events.get(event_id)
+                if event is not None and event['location_id'] is None:
+                    event['location_id'] = location_id
+
+def add_event_location_id(conn):
+    """Add the location_id column to event stores created before location resolution"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(events)')]
+    if 'location_id' not in columns:
+        conn.execute('ALTER TABLE events ADD COLUMN location_id TEXT')
+
+class SQLiteEventStore(EventStore):
+    """Event store in a WAL-mode SQLite file shared by every worker process
+
+    Ids come from an AUTOINCREMENT primary key, so allocation is atomic across
+    workers. Date, normalized location and event type are indexed.
+    """
+    
+    COLUMNS = ('id', 'name', 'location', 'date', 'event_type', 'location_id', 'created_at', 'updated_at')
+    
+    def __init__(self, path):
+        self.path = path
+        self.local = connection_local()
+    
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS events ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, '
+        'location TEXT NOT NULL, location_key TEXT NOT NULL, date TEXT NOT NULL, '
+        'event_type TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT, location_id TEXT)',
+        add_event_location_id,
+        'CREATE INDEX IF NOT EXISTS idx_events_date ON events (date)',
+        'CREATE INDEX IF NOT EXISTS idx_events_location ON events (location_key)',
+        'CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)',
+        'CREATE INDEX IF NOT EXISTS idx_events_location_id ON events (location_id)'
+    )
+    
+    def _connection(self):
+        return local_connection(self.local, self.path, self.SCHEMA)
+    
+    def _row_to_event(self, row):
+        event = dict(zip(self.COLUMNS, row))
+        if event['updated_at'] is None:
+            del event['updated_at']
+        return event
+    
+    def _select(self, where='', params=()):
+        return self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM events {where}", params
+        ).fetchall()
+    
+    INSERT = (
+        'INSERT INTO events (name, location, location_key, date, event_type, location_id, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)'
+    )
+    
+    def _insert_values(self, fields, created_at):
+        return (fields['name'], fields['location'], normalize_location(fields['location']),
+                fields['date'], fields['event_type'], fields.get('location_id'), created_at)
+    
+    def create(self, fields):
+        cursor = self._connection().execute(self.INSERT, self._insert_values(fields, datetime.now().isoformat()))
+        return self.get(cursor.lastrowid)
+    
+    def create_many(self, rows):
+        created_at = datetime.now().isoformat()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(self.INSERT, [self._insert_values(fields, created_at) for fields in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+    
+    def get(self, event_id):
+        rows = self._select('WHERE id = ?', (event_id,))
+        return self._row_to_event(rows[0]) if rows else None
+    
+    def get_many(self, event_ids):
+        events = {}
+        event_ids = list(event_ids)
+        for start in range(0, len(event_ids), 500):  # Stay under SQLite's bound parameter limit
+            chunk = event_ids[start:start + 500]
+            for row in self._select(f"WHERE id IN ({', '.join('?' * len(chunk))})", tuple(chunk)):
+                event = self._row_to_event(row)
+                events[event['id']] = event
+        return events
+    
+    def list(self, date_from=None, date_to=None, location=None, event_type=None, after_id=None, limit=None,
+             location_id=None):
+        conditions = []
+        params = []
+        for condition, value in (
+            ('id > ?', after_id),
+            ('date >= ?', date_from),
+            ('date <= ?', date_to),
+            ('location_key = ?', normalize_location(location) if location else None),
+            ('event_type = ?', event_type)
+        ):
+            if value is not None and value != '':
+                conditions.append(condition)
+                params.append(value)
+        if location_id:
+            location_ids = [location_id] if isinstance(location_id, str) else list(location_id)
+            conditions.append(f"location_id IN ({', '.join('?' * len(location_ids))})")
+            params.extend(location_ids)
+        
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        where += 'ORDER BY id'
+        if limit is not None:
+            where += ' LIMIT ?'
+            params.append(limit)
+        return [self._row_to_event(row) for row in self._select(where, tuple(params))]
+    
+    def update(self, event_id, fields):
+        fields = {
+            field: value for field, value in fields.items()
+            if field in ('name', 'location', 'date', 'event_type', 'location_id')
+        }
+        if 'location' in fields:
+            fields['location_key'] = normalize_location(fields['location'])
+        fields['updated_at'] = datetime.now().isoformat()
+        
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        cursor = self._connection().execute(
+            f"UPDATE events SET {assignments} WHERE id = ?", (*fields.values(), event_id)
+        )
+        return self.get(event_id) if cursor.rowcount else None
+    
+    def delete(self, event_id):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            event = self.get(event_id)
+            if event is not None:
+                conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return event
+    
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM events').fetchone()[0]
+    
+    def locations(self):
+        rows = self._connection().execute(
+            'SELECT location_key, MIN(location), MAX(location_id) FROM events GROUP BY location_key'
+        ).fetchall()
+        return {location_key: (location, location_id) for location_key, location, location_id in rows}
+    
+    def location_ids(self):
+        rows = self._connection().execute(
+            'SELECT DISTINCT location_id FROM events WHERE location_id IS NOT NULL'
+        ).fetchall()
+        return {location_id for location_id, in rows}
+    
+    def set_location_ids(self, location_ids):
+        self._connection().executemany(
+            'UPDATE events SET location_id = ? WHERE id = ? AND location_id IS NULL',
+            [(location_id, event_id) for event_id, location_id in location_ids.items()]
+        )
+
+def create_event_store():
+    """Build the configured event store"""
+    if EVENT_STORE_BACKEND == 'sqlite':
+        return SQLiteEventStore(EVENT_STORE_PATH)
+    if EVENT_STORE_BACKEND == 'memory':
+        return MemoryEventStore()
+    raise ValueError(f"Unknown EVENT_STORE_BACKEND: {EVENT_STORE_BACKEND}")
+
+event_store = create_event_store()
+
+class AlertLog:
+    """Append-only log of rating changes, read back by sequence number
+
+    Alerts are dicts; reads return them with their 'seq'. Only the newest
+    ALERT_HISTORY alerts are kept.
+    """
+    
+    def append(self, alert):
+        """Store an alert and return its sequence number"""
+        raise NotImplementedError
+    
+    def since(self, seq, limit=100):
+        """Return up to limit alerts newer than seq, oldest first"""
+        raise NotImplementedError
+    
+    def last_seq(self):
+        raise NotImplementedError
+    
+    def wait(self, seq, timeout):
+        """Block until an alert newer than seq may exist, or timeout seconds pass"""
+        raise NotImplementedError
+
+class MemoryAlertLog(AlertLog):
+    """Alert log for a single process"""
+    
+    def __init__(self, history):
+        self.alerts = deque(maxlen=history)
+        self.seq = 0
+        self.condition = threading.Condition()
+    
+    def append(self, alert):
+        with self.condition:
+            self.seq += 1
+            self.alerts.append({'seq': self.seq, **alert})
+            self.condition.notify_all()
+            return self.seq
+    
+    def since(self, seq, limit=100):
+        with self.condition:
+            return [alert for alert in self.alerts if alert['seq'] > seq][:limit]
+    
+    def last_seq(self):
+        return self.seq
+    
+    def wait(self, seq, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout)
+
+class SQLiteAlertLog(AlertLog):
+    """Alert log shared by every worker process through a SQLite file
+
+    Whichever worker refreshes a forecast records its alerts here, so streams
+    served by any worker see them.
+    """
+    
+    def __init__(self, path, history):
+        self.path = path
+        self.history = history
+        self.local = connection_local()
+    
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS alerts ('
+        'seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created_at REAL NOT NULL)',
+    )
+    
+    def _connection(self):
+        return local_connection(self.local, self.path, self.SCHEMA)
+    
+    def append(self, alert):
+        conn = self._connection()
+        seq = conn.execute(
+            'INSERT INTO alerts (payload, created_at) VALUES (?, ?)', (json.dumps(alert), time.time())
+        ).lastrowid
+        conn.execute('DELETE FROM alerts WHERE seq <= ?', (seq - self.history,))
+        return seq
+    
+    def since(self, seq, limit=100):
+        rows = self._connection().execute(
+            'SELECT seq, payload FROM alerts WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit)
+        ).fetchall()
+        return [{'seq': row_seq, **json.loads(payload)} for row_seq, payload in rows]
+    
+    def last_seq(self):
+        return self._connection().execute('SELECT COALESCE(MAX(seq), 0) FROM alerts').fetchone()[0]
+    
+    def wait(self, seq, timeout):
+        # Other workers append too, so poll rather than wait on a condition
+        deadline = time.time() + timeout
+        while self.last_seq() <= seq and time.time() < deadline:
+            time.sleep(min(ALERT_POLL_INTERVAL, max(deadline - time.time(), 0)))
+
+def create_alert_log():
+    """Build the configured alert log"""
+    if ALERT_LOG_BACKEND == 'sqlite':
+        return SQLiteAlertLog(EVENT_STORE_PATH, ALERT_HISTORY)
+    if ALERT_LOG_BACKEND == 'memory':
+        return MemoryAlertLog(ALERT_HISTORY)
+    raise ValueError(f"Unknown ALERT_LOG_BACKEND: {ALERT_LOG_BACKEND}")
+
+alert_log = create_alert_log()
+
+# Webhook deliveries are queued and sent by one background thread per worker
+webhook_queue = queue.Queue(maxsize=ALERT_WEBHOOK_QUEUE_SIZE)
+webhook_stats = Counter()
+_webhook_sender_pid = None
+_webhook_sender_lock = threading.Lock()
+
+def _webhook_sender_loop():
+    while True:
+        url, alert = webhook_queue.get()
+        for attempt in range(ALERT_WEBHOOK_RETRIES + 1):
+            try:
+                response = requests.post(url, json=alert, timeout=ALERT_WEBHOOK_TIMEOUT)
+                if response.status_code < 500:
+                    webhook_stats['delivered' if response.ok else 'failed'] += 1
+                    break
+            except requests.RequestException as e:
+                print(f"Alert webhook error: {e}")
+            if attempt < ALERT_WEBHOOK_RETRIES:
+                time.sleep(2 ** attempt)
+        else:
+            webhook_stats['failed'] += 1
+
+def start_webhook_sender():
+    """Start this worker's webhook delivery thread if it is not running yet"""
+    global _webhook_sender_pid
+    
+    if _webhook_sender_pid != os.getpid():
+        with _webhook_sender_lock:
+            if _webhook_sender_pid != os.getpid():
+                thread = threading.Thread(target=_webhook_sender_loop, name='alert-webhooks', daemon=True)
+                thread.start()
+                _webhook_sender_pid = os.getpid()
+
+def publish_alert(event, previous_suitability, suitability):
+    """Record a rating change and queue it for every configured webhook"""
+    alert = {
+        'type': 'rating_change',
+        'event_id': event['id'],
+        'name': event['name'],
+        'location': event['location'],
+        'date': event['date'],
+        'event_type': event['event_type'],
+        'previous_rating': previous_suitability['rating'],
+        'rating': suitability['rating'],
+        'previous_percentage': previous_suitability.get('percentage'),
+        'percentage': suitability.get('percentage'),
+        'detected_at': datetime.now().isoformat()
+    }
+    alert['seq'] = alert_log.append(alert)
+    
+    if ALERT_WEBHOOK_URLS:
+        start_webhook_sender()
+        for url in ALERT_WEBHOOK_URLS:
+            try:
+                webhook_queue.put_nowait((url, alert))
+            except queue.Full:
+                webhook_stats['dropped'] += 1
+    return alert
+
+def detect_rating_changes(target_id, previous, forecast):
+    """Publish an alert for each event under a target whose rating moved between two forecasts
+
+    Only events dated inside both forecast windows whose day's weather
+    changed are rescored. Events are found in the store by their canonical
+    location_id and ratings are derived from the two forecasts themselves,
+    so no per-worker state is needed. A grid cell target has no single
+    place id, so its events are those of every stored place id in the cell.
+    """
+    if previous is None:
+        return 0
+    
+    dates = previous['days'].keys() & forecast['days'].keys()
+    if not dates:
+        return 0
+    
+    if target_id.startswith('cell:'):
+        location_ids = [
+            location_id for location_id in event_store.location_ids() if place_target_id(location_id) == target_id
+        ]
+        if not location_ids:
+            return 0
+    else:
+        location_ids = target_id
+    
+    published = 0
+    after_id = None
+    while True:
+        page = event_store.list(
+            date_from=min(dates), date_to=max(dates), location_id=location_ids,
+            after_id=after_id, limit=EVENTS_MAX_PAGE_SIZE
+        )
+        if not page:
+            break
+        after_id = page[-1]['id']
+        
+        for event in page:
+            if event['date'] not in dates:
+                continue
+            before = previous['days'][event['date']]['weather']
+            after = forecast['days'][event['date']]['weather']
+            if before == after:
+                continue
+            previous_suitability = calculate_suitability_score(event['event_type'], before)
+            suitability = calculate_suitability_score(event['event_type'], after)
+            if previous_suitability['rating'] != suitability['rating']:
+                publish_alert(event, previous_suitability, suitability)
+                published += 1
+    return published
+
+def on_forecast_refreshed(target_id, previous, forecast):
+    """Rescore and alert on the events affected by a newly stored forecast"""
+    try:
+        rescore_target(target_id, forecast, previous)
+        detect_rating_changes(target_id, previous, forecast)
+    except Exception as e:
+        print(f"Alert error: {e}")
+
+def metrics_route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_route = metrics_route()
+    HTTP_IN_FLIGHT.inc(route=g.metrics_route)
+
+@app.after_request
+def record_request_metrics(response):
+    if 'metrics_started' in g:
+        HTTP_REQUESTS.inc(route=g.metrics_route, method=request.method, status=response.status_code)
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - g.metrics_started, route=g.metrics_route, method=request.method
+        )
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if 'metrics_route' in g:
+        HTTP_IN_FLIGHT.dec(route=g.metrics_route)
+
+@app.before_request
+def start_request_profile():
+    """Profile this request when it carries the admin PROFILE_TOKEN
+
+    Send the token as an X-Profile-Token header or ?profile= parameter, and
+    optionally X-Profile-Mode or ?profile_mode= set to 'sampled'. The
+    collapsed-stack profile is written to PROFILE_DIR and the response gets
+    a Server-Timing header with per-phase totals. Phases include the weather
+    fan-out threads, summed, so with parallel lookups they can add up to more
+    than the total.
+    """
+    token = request.headers.get('X-Profile-Token') or request.args.get('profile')
+    if not token:
+        return None
+    if not PROFILE_TOKEN or not hmac.compare_digest(token, PROFILE_TOKEN):
+        return jsonify({'error': 'Profiling is not enabled for this token'}), 403
+    
+    mode = request.headers.get('X-Profile-Mode') or request.args.get('profile_mode') or 'deterministic'
+    if mode not in ('deterministic', 'sampled'):
+        return jsonify({'error': 'profile_mode must be deterministic or sampled'}), 400
+    if GEVENT_ACTIVE:
+        # A sampler greenlet cannot interrupt the request it is sampling
+        mode = 'deterministic'
+    
+    request_phases.totals = {}
+    g.profile_started = time.perf_counter()
+    g.profiler = StackProfiler(mode)
+    g.profiler.start()
+    return None
+
+@app.after_request
+def finish_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    
+    profiler.stop()
+    total = time.perf_counter() - g.profile_started
+    totals = request_phases.totals
+    request_phases.totals = None
+    
+    timings = [f"{phase};dur={totals.get(phase, 0.0) * 1000:.2f}" for phase in PROFILE_PHASES]
+    timings.append(f"total;dur={total * 1000:.2f}")
+    response.headers['Server-Timing'] = ', '.join(timings)
+    
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = ''.join(char if char.isalnum() else '_' for char in request.path.strip('/')) or 'index'
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{request.method.lower()}-{slug}-{profiler.mode}.folded"
+        profiler.write(os.path.join(PROFILE_DIR, name))
+        response.headers['X-Profile-File'] = name
+    except OSError as e:
+        print(f"Profile write error: {e}")
+    return response
+
+@app.teardown_request
+def abandon_request_profile(error=None):
+    # A request that failed before after_request ran must not leave the profiler on
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        request_phases.totals = None
+
+def compressed_chunks(chunks, encoding):
+    """Compress a streamed body, flushing after every chunk so it still arrives incrementally"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.after_request
+def compress_response(response):
+    """Brotli or gzip encode textual responses for clients that accept it
+
+    Buffered bodies under COMPRESS_MIN_BYTES are left alone; streamed ones
+    are compressed chunk by chunk. Files and Server-Sent Events are never
+    compressed.
+    """
+    if (
+        response.status_code < 200 or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compressed_chunks(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.route('/')
+def index():
+    """Serve the main HTML page"""
+    return render_template('index.html')
+
+@app.route('/api/events', methods=['POST'])
+def create_event():
+    """Create a new event"""
+    try:
+        data = request.get_json()
+        required_fields = ['name', 'location', 'date', 'event_type']
+        
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        for field in required_fields:
+            if not isinstance(data[field], str):
+                return jsonify({'error': f'{field} must be a string'}), 400
+        
+        fields = {field: data[field] for field in required_fields}
+        fields['location_id'] = stored_location_id(resolve_location(data['location']))
+        
+        event = event_store.create(fields)
+        
+        return jsonify({
+            'message': 'Event created successfully',
+            'event': event
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def event_version(event):
+    """Changes whenever the event is edited"""
+    return event.get('updated_at') or event['created_at']
+
+def cached_forecast(location, fresh_only=False, location_id=None):
+    """The cached forecast serving a location, without fetching anything
+
+    With fresh_only, a stale entry counts as missing: a conditional request
+    must then go through the normal read so its background refresh starts.
+    """
+    target = resolve_forecast_target(location, allow_network=False, location_id=location_id)
+    if target is None:
+        return None
+    entry = forecast_cache.get(target['id'])
+    if entry is None or (fresh_only and not is_fresh(entry)):
+        return None
+    return entry
+
+def cached_forecast_fetched_at(location, fresh_only=False, location_id=None):
+    """When the cached forecast serving a location was fetched, if it is cached"""
+    entry = cached_forecast(location, fresh_only, location_id)
+    return entry['fetched_at'] if entry else None
+
+def first_remaining_slot(forecast):
+    """Start of the earliest forecast slot that has not ended yet
+
+    Responses that skip past slots change as time moves on even when the
+    forecast does not, so their validators include this.
+    """
+    now = time.time()
+    return next((slot['dt'] for slot in forecast['slots'] if slot['dt'] + FORECAST_SLOT_SECONDS > now), None)
+
+def make_etag(*parts):
+    """Opaque validator over the versions a response is built from"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+def forecast_cache_control(fetched_at):
+    """Let clients reuse a weather response until the forecast behind it expires"""
+    remaining = int(fetched_at + WEATHER_CACHE_TTL - time.time()) if fetched_at else 0
+    return f"public, max-age={max(remaining, 0)}"
+
+# Event responses change whenever someone edits the event, so clients always revalidate them
+EVENT_CACHE_CONTROL = 'private, no-cache'
+
+def not_modified(etag, cache_control):
+    """Empty 304 answer for a request whose If-None-Match matched"""
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def with_validators(response, etag, cache_control):
+    """Attach the ETag and Cache-Control to a built response"""
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def attach_weather(events_list, deadline=None):
+    """Add basic weather info and suitability scores to a list of events in place
+
+    Scores come from the materialized store; only events without a current
+    entry (new, edited elsewhere or expired) are scored here, waiting up to
+    deadline seconds (WEATHER_FANOUT_DEADLINE by default) for their forecasts.
+    """
+    now = time.time()
+    scores = {}
+    missing = []
+    for event in events_list:
+        entry = event_scores.get(event['id'])
+        if entry is None or entry['inputs'] != score_inputs(event) or entry['expires_at'] <= now:
+            missing.append(event)
+        else:
+            scores[event['id']] = entry
+    
+    if missing:
+        scores.update(materialize_scores(missing, deadline))
+    
+    for event in events_list:
+        score = scores[event['id']]
+        event['weather'] = score['weather']
+        event['suitability'] = score['suitability']
+        if 'weather_status' in score:
+            event['weather_status'] = score['weather_status']
+    
+    return events_list
+
+def encode_cursor(event_id):
+    """Encode the last event id of a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"id:{event_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor back into an event id"""
+    try:
+        prefix, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        if prefix != 'id':
+            raise ValueError
+        return int(event_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_event_query(args):
+    """Validate the GET /api/events query string into store filters and page options"""
+    for field in ('date_from', 'date_to'):
+        if args.get(field):
+            datetime.strptime(args[field], '%Y-%m-%d')
+    
+    limit = int(args.get('limit', EVENTS_PAGE_SIZE))
+    if not 1 <= limit <= EVENTS_MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {EVENTS_MAX_PAGE_SIZE}')
+    
+    min_rating = args.get('min_rating')
+    if min_rating:
+        min_rating = min_rating.title()
+        if min_rating not in RATING_ORDER:
+            raise ValueError(f"min_rating must be one of: {', '.join(RATING_ORDER)}")
+    
+    fields = [field.strip() for field in args['fields'].split(',') if field.strip()] if args.get('fields') else None
+    
+    return {
+        'filters': {
+            'date_from': args.get('date_from') or None,
+            'date_to': args.get('date_to') or None,
+            'location': args.get('location') or None,
+            'event_type': args.get('event_type') or None
+        },
+        'after_id': decode_cursor(args['cursor']) if args.get('cursor') else None,
+        'limit': limit,
+        'min_rating': min_rating,
+        'fields': fields
+    }
+
+def stream_event_list(events_list, fields, next_cursor):
+    """Yield the GET /api/events body EVENTS_STREAM_CHUNK events at a time
+
+    The output matches jsonify's compact form byte for byte, without ever
+    holding the whole serialized page.
+    """
+    dumps = functools.partial(app.json.dumps, separators=(',', ':'))
+    yield f'{{"count":{len(events_list)},"events":['
+    for start in range(0, len(events_list), EVENTS_STREAM_CHUNK):
+        chunk = events_list[start:start + EVENTS_STREAM_CHUNK]
+        items = chunk if fields is None else (select_fields(event, fields) for event in chunk)
+        yield (',' if start else '') + ','.join(dumps(item) for item in items)
+    yield f'],"next_cursor":{dumps(next_cursor)}}}\n'
+
+def select_fields(item, fields):
+    """Keep only the requested fields; 'parent.child' picks one key of a nested dict"""
+    selected = {}
+    for field in fields:
+        name, _, child = field.partition('.')
+        if name not in item:
+            continue
+        if child and isinstance(item[name], dict):
+            if child in item[name]:
+                selected.setdefault(name, {})[child] = item[name][child]
+        elif not child:
+            selected[name] = item[name]
+    return selected
+
+@app.route('/api/events', methods=['GET'])
+def list_events():
+    """List events with basic weather info and suitability scores
+
+    Supports cursor pagination (limit, cursor), filters (date_from, date_to,
+    location, event_type, min_rating) and sparse fields (fields=id,name,
+    suitability.rating). Weather is only resolved for events on the page.
+
+    With min_rating, at most EVENTS_MAX_SCAN_PAGES * limit events are scored
+    per request; the page may then come back short (even empty) with a
+    next_cursor after the last event scanned, for the client to continue.
+    """
+    try:
+        try:
+            query = parse_event_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        limit = query['limit']
+        min_rating = query['min_rating']
+        fields = query['fields']
+        needs_weather = min_rating is not None or fields is None or any(
+            field.partition('.')[0] in ('weather', 'weather_status', 'suitability') for field in fields
+        )
+        
+        events_list = []
+        after_id = query['after_id']
+        last_scanned = None
+        scanned = 0
+        has_more = True
+        while len(events_list) < limit and has_more and scanned < limit * EVENTS_MAX_SCAN_PAGES:
+            batch = event_store.list(**query['filters'], after_id=after_id, limit=limit + 1)
+            has_more = len(batch) > limit
+            batch = batch[:limit]
+            if not batch:
+                break
+            after_id = batch[-1]['id']
+            scanned += len(batch)
+            
+            if needs_weather:
+                attach_weather(batch)
+            
+            for event in batch:
+                if len(events_list) == limit:
+                    has_more = True
+                    break
+                last_scanned = event['id']
+                if min_rating and RATING_ORDER.get(event['suitability']['rating'], -1) < RATING_ORDER[min_rating]:
+                    continue
+                events_list.append(event)
+        
+        # Continue after the last event scanned, which may be one the filter dropped
+        next_cursor = encode_cursor(last_scanned) if has_more and last_scanned is not None else None
+        
+        # Scores come from the materialized store, so the page's validator is cheap to build
+        # and a matching client skips serialization entirely
+        etag_parts = [request.query_string.decode(), next_cursor]
+        for event in events_list:
+            etag_parts.append(f"{event['id']}:{event_version(event)}")
+            if needs_weather:
+                entry = event_scores.get(event['id'])
+                etag_parts.append(entry['expires_at'] if entry else event['suitability']['rating'])
+        etag = make_etag(*etag_parts)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag, EVENT_CACHE_CONTROL)
+        
+        body = stream_event_list(events_list, fields, next_cursor)
+        if len(events_list) <= EVENTS_STREAM_CHUNK:
+            # One chunk anyway: send it buffered, with a Content-Length
+            body = ''.join(body)
+        return with_validators(Response(body, mimetype='application/json'), etag, EVENT_CACHE_CONTROL)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def read_bulk_rows(stream, content_type):
+    """Yield (line number, row dict or None, error) for each record of an NDJSON or CSV body"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    
+    if 'csv' in content_type:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, row, None
+
+def validate_bulk_row(row, required_fields):
+    """Return why an imported row cannot become an event, or None if it can"""
+    missing = [field for field in required_fields if not row.get(field)]
+    if missing:
+        return f"Missing required field: {', '.join(missing)}"
+    try:
+        datetime.strptime(str(row['date']), '%Y-%m-%d')
+    except ValueError:
+        return 'date must be YYYY-MM-DD'
+    if row['event_type'] not in EVENT_WEATHER_PREFERENCES:
+        return f"event_type must be one of: {', '.join(EVENT_WEATHER_PREFERENCES)}"
+    return None
+
+@app.route('/api/events/bulk', methods=['POST'])
+def bulk_create_events():
+    """Create many events from a streamed NDJSON (default) or CSV body
+
+    Rows are validated one by one and inserted in batches of BULK_BATCH_SIZE.
+    Invalid rows are skipped and reported with their line number.
+    """
+    try:
+        required_fields = ['name', 'location', 'date', 'event_type']
+        created = 0
+        errors = []
+        error_count = 0
+        batch = []
+        
+        for line_number, row, error in read_bulk_rows(request.stream, request.content_type or ''):
+            if error is None:
+                error = validate_bulk_row(row, required_fields)
+            
+            if error is not None:
+                error_count += 1
+                if len(errors) < BULK_MAX_ERRORS:
+                    errors.append({'line': line_number, 'error': error})
+                continue
+            
+            fields = {field: str(row[field]) for field in required_fields}
+            # Imports only use already cached resolutions; the rest are recorded when first scored
+            fields['location_id'] = stored_location_id(resolve_location(fields['location'], allow_network=False))
+            batch.append(fields)
+            if len(batch) >= BULK_BATCH_SIZE:
+                created += event_store.create_many(batch)
+                batch = []
+        
+        if batch:
+            created += event_store.create_many(batch)
+        
+        return jsonify({
+            'message': 'Bulk import completed',
+            'created': created,
+            'error_count': error_count,
+            'errors': errors
+        }), 201 if created else 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def export_row(event):
+    """Flatten an event with weather and suitability into one CSV row"""
+    weather = event.get('weather') or {}
+    suitability = event.get('suitability') or {}
+    row = {**event, **weather, **{key: value for key, value in suitability.items() if key != 'details'}}
+    return {column: row.get(column, '') for column in EXPORT_CSV_COLUMNS}
+
+@app.route('/api/events/export', methods=['GET'])
+def export_events():
+    """Stream every matching event with its scores as NDJSON (default) or CSV
+
+    Events are read and scored one page at a time, so memory stays flat
+    however large the calendar is. Accepts the same filters as GET /api/events,
+    including min_rating; fields applies to NDJSON only, since CSV rows have
+    fixed columns.
+    """
+    try:
+        query = parse_event_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    if export_format == 'csv' and query['fields'] is not None:
+        return jsonify({'error': 'fields is only supported with format=ndjson'}), 400
+    
+    min_rating = query['min_rating']
+    fields = query['fields']
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS)
+        if export_format == 'csv':
+            writer.writeheader()
+            yield buffer.getvalue()
+        
+        after_id = query['after_id']
+        while True:
+            page = event_store.list(**query['filters'], after_id=after_id, limit=query['limit'])
+            if not page:
+                break
+            after_id = page[-1]['id']
+            
+            # An export is a complete snapshot, so it waits for weather rather than writing Pending rows
+            chunk = []
+            for event in attach_weather(page, EXPORT_WEATHER_DEADLINE):
+                if min_rating and RATING_ORDER.get(event['suitability']['rating'], -1) < RATING_ORDER[min_rating]:
+                    continue
+                if export_format == 'csv':
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(export_row(event))
+                    chunk.append(buffer.getvalue())
+                else:
+                    if fields is not None:
+                        event = select_fields(event, fields)
+                    chunk.append(app.json.dumps(event, separators=(',', ':')) + '\n')
+            yield ''.join(chunk)
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.route('/api/events/<int:event_id>', methods=['PUT'])
+def update_event(event_id):
+    """Update an event's details"""
+    try:
+        if event_store.get(event_id) is None:
+            return jsonify({'error': 'Event not found'}), 404
+        
         data = request.get_json()
-        event = events[event_id]
         
         # Update allowed fields
         allowed_fields = ['name', 'location', 'date', 'event_type']
-        for field in allowed_fields:
-            if field in data:
-                event[field] = data[field]
+        fields = {field: data[field] for field in allowed_fields if field in data}
+        for field, value in fields.items():
+            if not isinstance(value, str):
+                return jsonify({'error': f'{field} must be a string'}), 400
+        if 'location' in fields:
+            fields['location_id'] = stored_location_id(resolve_location(fields['location']))
+        
+        event = event_store.update(event_id, fields)
+        if event is None:
+            return jsonify({'error': 'Event not found'}), 404
         
-        event['updated_at'] = datetime.now().isoformat()
+        # Only this event's score changes; the next read rescores it
+        event_scores.discard(event_id)
         
         return jsonify({
             'message': 'Event updated successfully',
@@ -711,10 +3359,10 @@ def update_event(event_id):
 def delete_event(event_id):
     """Delete an event"""
     try:
-        if event_id not in events:
+        deleted_event = event_store.delete(event_id)
+        if deleted_event is None:
             return jsonify({'error': 'Event not found'}), 404
-        
-        deleted_event = events.pop(event_id)
+        event_scores.discard(event_id)
         
         return jsonify({
             'message': 'Event deleted successfully',
@@ -728,14 +3376,24 @@ def delete_event(event_id):
 def get_weather(location, date):
     """Fetch and show weather data for a location and date"""
     try:
+        fetched_at = cached_forecast_fetched_at(location, fresh_only=True)
+        if fetched_at is not None:
+            etag = make_etag('weather', location, date, fetched_at)
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag, forecast_cache_control(fetched_at))
+        
         weather_data = get_weather_data(location, date)
         
         if weather_data:
-            return jsonify({
+            response = jsonify({
                 'location': location,
                 'date': date,
-                'weather': weather_data
+                'weather': weather_data,
+                'day': get_day_summary(location, date)
             })
+            fetched_at = cached_forecast_fetched_at(location)
+            etag = make_etag('weather', location, date, fetched_at) if fetched_at else None
+            return with_validators(response, etag, forecast_cache_control(fetched_at))
         else:
             return jsonify({'error': 'Unable to fetch weather data'}), 500
             
@@ -746,82 +3404,216 @@ def get_weather(location, date):
 def get_suitability(event_id):
     """Return a suitability score with detailed breakdown"""
     try:
-        if event_id not in events:
+        event = event_store.get(event_id)
+        if event is None:
             return jsonify({'error': 'Event not found'}), 404
         
-        event = events[event_id]
-        weather_data = get_weather_data(event['location'], event['date'])
+        fetched_at = cached_forecast_fetched_at(event['location'], fresh_only=True, location_id=event['location_id'])
+        if fetched_at is not None:
+            etag = make_etag('suitability', event_id, event_version(event), fetched_at)
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag, EVENT_CACHE_CONTROL)
+        
+        weather_data = get_weather_data(event['location'], event['date'], location_id=event['location_id'])
         
         if not weather_data:
             return jsonify({'error': 'Unable to fetch weather data'}), 500
         
         suitability = calculate_suitability_score(event['event_type'], weather_data)
         
-        return jsonify({
+        fetched_at = cached_forecast_fetched_at(event['location'], location_id=event['location_id'])
+        etag = make_etag('suitability', event_id, event_version(event), fetched_at) if fetched_at else None
+        return with_validators(jsonify({
             'event': event,
             'weather': weather_data,
             'suitability': suitability
-        })
+        }), etag, EVENT_CACHE_CONTROL)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/events/<int:event_id>/alternatives', methods=['GET'])
 def get_alternatives(event_id):
-    """Suggest alternative dates within the same week if current weather is poor"""
+    """Suggest the best date and time windows around the event date"""
     try:
-        if event_id not in events:
+        event = event_store.get(event_id)
+        if event is None:
             return jsonify({'error': 'Event not found'}), 404
         
-        event = events[event_id]
-        current_weather = get_weather_data(event['location'], event['date'])
-        
-        if not current_weather:
+        cached = cached_forecast(event['location'], fresh_only=True, location_id=event['location_id'])
+        if cached is not None:
+            etag = make_etag(
+                'alternatives', event_id, event_version(event), cached['fetched_at'], first_remaining_slot(cached)
+            )
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag, EVENT_CACHE_CONTROL)
+        
+        # One cached forecast answers the current date and every candidate window
+        forecast = get_forecast(event['location'], event['location_id'])
+        if not forecast:
             return jsonify({'error': 'Unable to fetch weather data'}), 500
         
+        current_weather = get_forecast_for_date(forecast, event['date'])
         current_suitability = calculate_suitability_score(event['event_type'], current_weather)
         
-        alternatives = []
-        event_date = datetime.strptime(event['date'], '%Y-%m-%d')
-        
-        # Check dates within the same week
-        for i in range(-3, 4):  # 3 days before and after
-            if i == 0:  # Skip current date
-                continue
-                
-            alternative_date = event_date + timedelta(days=i)
-            alternative_date_str = alternative_date.strftime('%Y-%m-%d')
-            
-            weather_data = get_weather_data(event['location'], alternative_date_str)
-            if weather_data:
-                suitability = calculate_suitability_score(event['event_type'], weather_data)
-                alternatives.append({
-                    'date': alternative_date_str,
-                    'weather': weather_data,
-                    'suitability': suitability
-                })
-        
-        # Sort alternatives by suitability score (highest first)
-        alternatives.sort(key=lambda x: x['suitability']['score'], reverse=True)
+        event_date = datetime.strptime(event['date'], '%Y-%m-%d').date()
+        alternatives = find_best_windows(forecast['slots'], event['event_type'], event_date)
         
-        return jsonify({
+        return with_validators(jsonify({
             'event': event,
             'current_weather': current_weather,
             'current_suitability': current_suitability,
-            'alternatives': alternatives[:5]  # Return top 5 alternatives
+            'alternatives': alternatives
+        }), make_etag(
+            'alternatives', event_id, event_version(event), forecast['fetched_at'], first_remaining_slot(forecast)
+        ), EVENT_CACHE_CONTROL)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_alert_query(args, last_event_id=None):
+    """Validate the alert endpoints' query string into (since, event ids or None)"""
+    since = last_event_id or args.get('since')
+    since = int(since) if since else None
+    if since is not None and since < 0:
+        raise ValueError('since must not be negative')
+    
+    event_ids = None
+    if args.get('event_id'):
+        event_ids = {int(event_id) for event_id in args['event_id'].split(',') if event_id.strip()}
+    return since, event_ids
+
+@app.route('/api/alerts', methods=['GET'])
+def list_alerts():
+    """List rating change alerts after ?since=<seq>, optionally for some event ids"""
+    try:
+        try:
+            since, event_ids = parse_alert_query(request.args)
+            limit = int(request.args.get('limit', EVENTS_PAGE_SIZE))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        batch = alert_log.since(since or 0, limit)
+        alerts = [alert for alert in batch if event_ids is None or alert['event_id'] in event_ids]
+        
+        return jsonify({
+            'alerts': alerts,
+            'count': len(alerts),
+            'next_since': batch[-1]['seq'] if batch else (since or 0)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/alerts/stream', methods=['GET'])
+def stream_alerts():
+    """Push rating change alerts as Server-Sent Events
+
+    Resumes after Last-Event-ID (or ?since=); otherwise starts from now.
+    ?event_id=1,2 limits the stream to some events. Under sync workers the
+    response sends what is pending and closes, and the browser's automatic
+    reconnect turns the stream into cheap polling; under gevent it stays
+    open for ALERT_STREAM_TIMEOUT seconds.
+    """
+    try:
+        since, event_ids = parse_alert_query(request.args, request.headers.get('Last-Event-ID'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        seq = alert_log.last_seq() if since is None else since
+        # An id-only message moves the client's Last-Event-ID without firing an event
+        yield f"retry: {ALERT_STREAM_RETRY}\nid: {seq}\n\n"
+        
+        deadline = time.time() + ALERT_STREAM_TIMEOUT
+        while True:
+            batch = alert_log.since(seq)
+            for alert in batch:
+                seq = alert['seq']
+                if event_ids is None or alert['event_id'] in event_ids:
+                    yield f"id: {seq}\nevent: rating_change\ndata: {json.dumps(alert)}\n\n"
+            if batch:
+                yield f"id: {seq}\n\n"
+                continue
+            
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            alert_log.wait(seq, min(remaining, ALERT_HEARTBEAT))
+            yield ": keep-alive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def collect_metrics():
+    """Copy counters kept by the caches, breaker and stores into their metrics"""
+    caches = {'weather': weather_cache, 'forecast': forecast_cache, 'negative': negative_cache, 'geocode': geocode_cache}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_HITS.set(stats['hits'], cache=name)
+        CACHE_MISSES.set(stats['misses'], cache=name)
+        CACHE_EVICTIONS.set(stats['evictions'], cache=name)
+        CACHE_EXPIRATIONS.set(stats['expirations'], cache=name)
+        CACHE_ENTRIES.set(stats['entries'], cache=name)
+    
+    COALESCED_REQUESTS.set(weather_flight.coalesced)
+    UPSTREAM_CIRCUIT_OPEN.set(int(weather_circuit.snapshot()['state'] != 'closed'))
+    SCORED_EVENTS.set(event_scores.stats()['events'])
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request, upstream, cache and scoring metrics in the Prometheus text format
+
+    Each gunicorn worker keeps its own values, so a scrape sees the worker
+    that answered it, labelled worker="<pid>". Aggregate across workers in
+    queries, e.g. sum without (worker) (rate(http_requests_total[5m])).
+    """
+    try:
+        collect_metrics()
+        lines = []
+        for metric in METRICS:
+            lines.extend(metric.render())
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'events_count': len(events)
+        'events_count': event_store.count(),
+        'cache': {
+            'weather': weather_cache.stats(),
+            'forecast': forecast_cache.stats(),
+            'negative': negative_cache.stats(),
+            'geocode': geocode_cache.stats(),
+            'coalesced_requests': weather_flight.coalesced,
+            'scores': event_scores.stats()
+        },
+        'upstream': {
+            'circuit': weather_circuit.snapshot()
+        },
+        'spatial_index': spatial_index.stats(),
+        'alerts': {
+            'last_seq': alert_log.last_seq(),
+            'webhooks': {
+                'queued': webhook_queue.qsize(),
+                'delivered': webhook_stats['delivered'],
+                'failed': webhook_stats['failed'],
+                'dropped': webhook_stats['dropped']
+            }
+        }
     })
 
+# Optional proactive refresh; each gunicorn worker imports the app and runs its own scheduler
+if WEATHER_REFRESH_INTERVAL > 0:
+    start_forecast_refresher()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 8000))) 
\ No newline at end of file
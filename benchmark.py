@@ -0,0 +1,391 @@
+"""Offline load benchmark for the Smart Event Planner
+
+Starts a local stand-in for the OpenWeatherMap forecast, current weather and
+geocoding APIs with configurable latency and error rate, points the app at it
+and drives realistic request mixes through it. Every scenario runs against a
+cold and then a warm cache and reports throughput, p50/p95/p99 latency and
+the upstream calls it caused.
+
+    python benchmark.py --events 500 --locations 25 --requests 2000
+    python benchmark.py --scenarios list,mix --latency 300 --error-rate 0.05
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+
+By default the app runs in-process behind Flask's test client. To measure a
+real server (e.g. gunicorn in gevent mode), start it with
+OPENWEATHER_BASE_URL and OPENWEATHER_GEO_URL pointing at --upstream-port and
+pass --url; its caches cannot be reset, so the two passes are reported as
+first and repeat instead.
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+SCENARIOS = ('list', 'suitability', 'alternatives', 'weather', 'mix')
+
+# Share of requests per endpoint in the 'mix' scenario, roughly what the dashboard sends
+MIX_WEIGHTS = {'list': 50, 'suitability': 25, 'alternatives': 15, 'weather': 10}
+
+EVENT_TYPES = ('sports', 'formal', 'adventure', 'picnic')
+DESCRIPTIONS = ('clear sky', 'few clouds', 'overcast clouds', 'light rain', 'moderate rain', 'mist')
+FORECAST_SLOTS = 40
+SLOT_SECONDS = 10800
+
+class FakeOpenWeather:
+    """Threaded HTTP server answering like OpenWeatherMap, with injected latency and errors
+
+    Responses are deterministic per city, so runs are comparable; calls are
+    counted per endpoint.
+    """
+    
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, port=0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 1024
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+    
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='fake-openweather', daemon=True).start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.calls)
+    
+    def _delay_and_fail(self):
+        with self.lock:
+            delay = max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0)
+            failed = self.random.random() < self.error_rate
+        time.sleep(delay)
+        return failed
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+                with fake.lock:
+                    fake.calls[endpoint] += 1
+                
+                if fake._delay_and_fail():
+                    return self._send(500, {'cod': 500, 'message': 'injected failure'})
+                
+                if endpoint == 'forecast':
+                    return self._send(200, forecast_body(city_key(query)))
+                if endpoint == 'weather':
+                    return self._send(200, current_weather_body(city_key(query)))
+                if endpoint == 'direct':
+                    return self._send(200, geocode_body(query.get('q', '')))
+                return self._send(404, {'cod': '404', 'message': 'not found'})
+            
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        return Handler
+
+def city_key(query):
+    if 'lat' in query:
+        return f"{float(query['lat']):.2f},{float(query['lon']):.2f}"
+    return query.get('q', '').lower()
+
+def city_seed(key):
+    return zlib.crc32(key.encode())
+
+def weather_item(rng, seasonal_offset):
+    item = {
+        'main': {'temp': round(seasonal_offset + rng.uniform(-6, 14), 1), 'humidity': rng.randint(30, 95)},
+        'wind': {'speed': round(rng.uniform(0, 14), 1)},
+        'weather': [{'description': rng.choice(DESCRIPTIONS), 'icon': '01d'}]
+    }
+    if 'rain' in item['weather'][0]['description']:
+        item['rain'] = {'3h': round(rng.uniform(0.2, 9), 1)}
+    return item
+
+def forecast_body(key):
+    rng = random.Random(city_seed(key))
+    offset = rng.uniform(0, 12)
+    start = int(time.time()) // SLOT_SECONDS * SLOT_SECONDS
+    items = [{'dt': start + index * SLOT_SECONDS, **weather_item(rng, offset)} for index in range(FORECAST_SLOTS)]
+    return {
+        'cod': '200',
+        'list': items,
+        'city': {'name': key, 'timezone': rng.choice((0, 3600, 19800, -18000)), 'coord': {'lat': 0, 'lon': 0}}
+    }
+
+def current_weather_body(key):
+    rng = random.Random(city_seed(key) + int(time.time()) // SLOT_SECONDS)
+    return {'cod': 200, 'name': key, **weather_item(rng, rng.uniform(0, 12))}
+
+def geocode_body(name):
+    rng = random.Random(city_seed(name.lower()))
+    return [{
+        'name': name.split(',')[0].strip().title(),
+        'lat': round(rng.uniform(-60, 60), 4),
+        'lon': round(rng.uniform(-170, 170), 4),
+        'country': 'XX'
+    }]
+
+class InProcessClient:
+    """Drive the imported app through Flask's test client"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def request(self, method, path, body=None):
+        client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+class HTTPClient:
+    """Drive a running server over HTTP"""
+    
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.local = threading.local()
+    
+    def request(self, method, path, body=None):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        response = session.request(method, self.url + path, json=body, timeout=120)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+def configure_app(upstream):
+    """Point the app at the fake upstream and import it"""
+    os.environ['OPENWEATHER_BASE_URL'] = upstream.url
+    os.environ['OPENWEATHER_GEO_URL'] = upstream.url + '/geo/1.0'
+    os.environ.setdefault('OPENWEATHER_API_KEY', 'benchmark')
+    # The free-plan quota would otherwise dominate every number
+    os.environ.setdefault('OPENWEATHER_CALLS_PER_MINUTE', '0')
+    os.environ.setdefault('WEATHER_CACHE_BACKEND', 'memory')
+    os.environ.setdefault('EVENT_STORE_BACKEND', 'memory')
+    os.environ.setdefault('WEATHER_REFRESH_INTERVAL', '0')
+    
+    import app as planner
+    return planner
+
+def reset_caches(planner):
+    """Drop everything the in-process app has cached or materialized"""
+    for cache in (planner.weather_cache, planner.forecast_cache, planner.negative_cache, planner.geocode_cache):
+        cache.clear()
+    planner.event_scores = planner.ScoreStore()
+    planner.spatial_index = planner.SpatialIndex(planner.SPATIAL_INDEX_MAX_ENTRIES)
+
+def seed_events(client, count, locations, days, rng):
+    """Create the benchmark events and return (ids, location names, dates)"""
+    names = [f"Benchtown {index:03d}" for index in range(locations)]
+    dates = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(days)]
+    ids = []
+    for index in range(count):
+        status, body = client.request('POST', '/api/events', {
+            'name': f"Benchmark event {index}",
+            'location': rng.choice(names),
+            'date': rng.choice(dates),
+            'event_type': rng.choice(EVENT_TYPES)
+        })
+        if status != 201:
+            raise RuntimeError(f"Seeding failed with HTTP {status}: {body}")
+        ids.append(body['event']['id'])
+    return ids, names, dates
+
+def encode_cursor(event_id):
+    return base64.urlsafe_b64encode(f"id:{event_id}".encode()).decode()
+
+def plan_requests(scenario, total, ids, names, dates, page_size, rng):
+    """Build the request paths for one scenario run"""
+    page_starts = [None] + [ids[index - 1] for index in range(page_size, len(ids), page_size)]
+    
+    def path_for(kind):
+        if kind == 'list':
+            after_id = rng.choice(page_starts)
+            cursor = f"&cursor={encode_cursor(after_id)}" if after_id else ''
+            return f"/api/events?limit={page_size}{cursor}"
+        if kind == 'suitability':
+            return f"/api/events/{rng.choice(ids)}/suitability"
+        if kind == 'alternatives':
+            return f"/api/events/{rng.choice(ids)}/alternatives"
+        return f"/api/weather/{rng.choice(names)}/{rng.choice(dates)}"
+    
+    if scenario == 'mix':
+        kinds = rng.choices(list(MIX_WEIGHTS), weights=list(MIX_WEIGHTS.values()), k=total)
+    else:
+        kinds = [scenario] * total
+    return [path_for(kind) for kind in kinds]
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def run_phase(client, paths, concurrency):
+    """Send every path with the given concurrency; returns (latencies, error count, wall seconds)"""
+    def timed(path):
+        started = time.perf_counter()
+        try:
+            status, _ = client.request('GET', path)
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - started, status is None or status >= 400
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, paths))
+    wall = time.perf_counter() - started
+    
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, failed in results if failed)
+    return latencies, errors, wall
+
+def summarize(scenario, cache, latencies, errors, wall, upstream_calls):
+    return {
+        'scenario': scenario,
+        'cache': cache,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'upstream': upstream_calls
+    }
+
+def upstream_delta(before, after):
+    return {endpoint: after[endpoint] - before.get(endpoint, 0) for endpoint in after if after[endpoint] - before.get(endpoint, 0)}
+
+def print_results(results, baseline=None):
+    baseline = {(row['scenario'], row['cache']): row for row in baseline or []}
+    header = f"{'scenario':<13}{'cache':<7}{'reqs':>6}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  upstream"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        upstream = ', '.join(f"{endpoint}={count}" for endpoint, count in sorted(row['upstream'].items())) or '-'
+        print(
+            f"{row['scenario']:<13}{row['cache']:<7}{row['requests']:>6}{row['errors']:>8}"
+            f"{row['throughput']:>10.1f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}  {upstream}"
+        )
+        previous = baseline.get((row['scenario'], row['cache']))
+        if previous:
+            deltas = []
+            for key, label in (('throughput', 'req/s'), ('p50_ms', 'p50'), ('p95_ms', 'p95'), ('p99_ms', 'p99')):
+                if previous[key]:
+                    deltas.append(f"{label} {(row[key] - previous[key]) / previous[key] * 100:+.1f}%")
+            calls = sum(row['upstream'].values()) - sum(previous['upstream'].values())
+            print(f"{'':<20}vs baseline: {', '.join(deltas)}, upstream calls {calls:+d}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--events', type=int, default=200, help='events to create before measuring')
+    parser.add_argument('--locations', type=int, default=20, help='distinct event locations')
+    parser.add_argument('--days', type=int, default=7, help='spread event dates over this many days from today')
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario and cache pass')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--page-size', type=int, default=50, help='limit used by list requests')
+    parser.add_argument('--latency', type=float, default=50, help='mean upstream latency in ms')
+    parser.add_argument('--jitter', type=float, default=20, help='upstream latency jitter in ms (uniform +/-)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls answered with HTTP 500')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--upstream-port', type=int, default=0, help='port for the fake OpenWeatherMap server')
+    parser.add_argument('--save', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='show changes against results saved with --save')
+    args = parser.parse_args()
+    
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    upstream = FakeOpenWeather(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+        port=args.upstream_port, seed=args.seed
+    ).start()
+    
+    planner = None
+    if args.url:
+        client = HTTPClient(args.url)
+        print(f"Fake OpenWeatherMap at {upstream.url}; benchmarking {args.url}")
+    else:
+        planner = configure_app(upstream)
+        client = InProcessClient(planner.app)
+    
+    ids, names, dates = seed_events(client, args.events, args.locations, args.days, rng)
+    print(
+        f"{len(ids)} events over {args.locations} locations, {args.requests} requests per pass, "
+        f"concurrency {args.concurrency}, upstream {args.latency:.0f}±{args.jitter:.0f} ms, "
+        f"error rate {args.error_rate:.0%}\n"
+    )
+    
+    # A remote server's caches cannot be reset, so its passes are just first and repeat
+    passes = ('cold', 'warm') if planner is not None else ('first', 'repeat')
+    results = []
+    for scenario in args.scenarios:
+        paths = plan_requests(scenario, args.requests, ids, names, dates, args.page_size, rng)
+        for cache in passes:
+            if cache == 'cold':
+                reset_caches(planner)
+            before = upstream.snapshot()
+            latencies, errors, wall = run_phase(client, paths, args.concurrency)
+            results.append(summarize(scenario, cache, latencies, errors, wall, upstream_delta(before, upstream.snapshot())))
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'settings': {key: value for key, value in vars(args).items() if key not in ('save', 'compare')},
+                       'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    
+    upstream.stop()
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,18 @@
 # Start script for Smart Event Planner
 
 echo "Starting Smart Event Planner..."
-gunicorn app:app --bind 0.0.0.0:$PORT --workers 2 --timeout 120 
\ No newline at end of file
+
+# Share one on-disk weather cache and event store between the gunicorn workers
+export WEATHER_CACHE_BACKEND=${WEATHER_CACHE_BACKEND:-sqlite}
+export EVENT_STORE_BACKEND=${EVENT_STORE_BACKEND:-sqlite}
+
+# The app splits the OpenWeatherMap quota between this many workers
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-2}
+
+# SERVER_MODE=gevent serves each request on a greenlet, so one worker can hold
+# thousands of slow upstream calls in flight instead of one per worker
+if [ "${SERVER_MODE:-sync}" = "gevent" ]; then
+    WORKER_ARGS="--worker-class gevent --worker-connections ${WORKER_CONNECTIONS:-1000}"
+fi
+
+gunicorn app:app --bind 0.0.0.0:$PORT --workers $WEB_CONCURRENCY $WORKER_ARGS --timeout 120 
\ No newline at end of file
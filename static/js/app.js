@@ -12,6 +12,7 @@ class EventPlanner {
         this.bindEvents();
         this.loadEvents();
         this.setMinDate();
+        this.watchAlerts();
     }
 
     bindEvents() {
@@ -56,6 +57,26 @@ class EventPlanner {
         }, 5000);
     }
 
+    watchAlerts() {
+        // The server pushes rating changes when forecasts refresh; no need to poll every event
+        if (!window.EventSource) {
+            return;
+        }
+
+        const ratings = ['Poor', 'Okay', 'Good'];
+        const source = new EventSource(`${this.apiBase}/alerts/stream`);
+        source.addEventListener('rating_change', (e) => {
+            const alert = JSON.parse(e.data);
+            const dropped = ratings.indexOf(alert.rating) < ratings.indexOf(alert.previous_rating);
+            this.showNotification(
+                `<strong>${alert.name}</strong>: weather rating changed from ${alert.previous_rating} to ${alert.rating}`,
+                dropped ? 'warning' : 'info'
+            );
+            clearTimeout(this.alertReload);
+            this.alertReload = setTimeout(() => this.loadEvents(), 500);
+        });
+    }
+
     async createEvent() {
         const formData = {
             name: document.getElementById('eventName').value,
@@ -88,13 +109,42 @@ class EventPlanner {
     }
 
     async loadEvents() {
+        // The dashboard cards don't show the score breakdown, so skip it
+        const fields = [
+            'id', 'name', 'location', 'date', 'event_type', 'created_at',
+            'weather', 'weather_status', 'suitability.score', 'suitability.max_score',
+            'suitability.percentage', 'suitability.rating'
+        ].join(',');
+
         try {
-            const response = await fetch(`${this.apiBase}/events`);
-            const result = await response.json();
+            const events = [];
+            let cursor = null;
+            let response;
+            let result;
+
+            do {
+                const params = new URLSearchParams({ fields, limit: 100 });
+                if (cursor) {
+                    params.set('cursor', cursor);
+                }
+                response = await fetch(`${this.apiBase}/events?${params}`);
+                result = await response.json();
+                if (!response.ok) {
+                    break;
+                }
+                events.push(...result.events);
+                cursor = result.next_cursor;
+            } while (cursor);
 
             if (response.ok) {
-                this.events = result.events;
+                this.events = events;
                 this.renderEvents();
+
+                // Reload once more if some forecasts were still being fetched
+                if (this.events.some(event => event.weather_status === 'pending')) {
+                    clearTimeout(this.pendingReload);
+                    this.pendingReload = setTimeout(() => this.loadEvents(), 3000);
+                }
             } else {
                 this.showNotification('Failed to load events', 'danger');
             }
@@ -138,7 +188,9 @@ class EventPlanner {
                     </div>
                 </div>
             </div>
-        ` : '<div class="text-muted">Weather data unavailable</div>';
+        ` : event.weather_status === 'pending'
+            ? '<div class="text-muted">Weather data loading...</div>'
+            : '<div class="text-muted">Weather data unavailable</div>';
 
         // Suitability score display
         const suitabilityInfo = event.suitability ? `
@@ -385,7 +437,7 @@ class EventPlanner {
                 <div class="modal-content">
                     <div class="modal-header bg-warning text-white">
                         <h5 class="modal-title" id="alternativesModalLabel">
-                            <i class="fas fa-calendar-alt me-2"></i>Alternative Dates
+                            <i class="fas fa-calendar-alt me-2"></i>Alternative Times
                         </h5>
                         <button type="button" class="btn-close btn-close-white" data-bs-dismiss="modal" aria-label="Close"></button>
                     </div>
@@ -400,12 +452,13 @@ class EventPlanner {
                             </span>
                         </div>
                         
-                        <h6>Alternative Dates:</h6>
+                        <h6>Best Time Windows:</h6>
                         ${alternatives.length > 0 ? alternatives.map(alt => `
                             <div class="alternative-date mb-3 p-3 border rounded">
                                 <div class="d-flex justify-content-between align-items-center">
                                     <div>
                                         <strong>${this.formatDate(alt.date)}</strong>
+                                        ${alt.window ? `<span class="text-muted small ms-1">${alt.window}</span>` : ''}
                                         <span class="suitability-badge suitability-${alt.suitability.rating.toLowerCase()} ms-2">
                                             ${alt.suitability.rating} (${alt.suitability.score}/${alt.suitability.max_score})
                                         </span>
@@ -0,0 +1,375 @@
+"""Frozen copy of the per-event-type scoring branches replaced by the factor table
+
+The regression suite checks the compiled scorers against this reference, so
+it must not be edited to follow changes in app.py.
+"""
+from app import EVENT_WEATHER_PREFERENCES
+
+
+def legacy_suitability_score(event_type, weather_data):
+    """calculate_suitability_score as it was before the compiled factor table"""
+    if not weather_data or event_type not in EVENT_WEATHER_PREFERENCES:
+        return {"score": 0, "rating": "Poor", "details": {}}
+    
+    prefs = EVENT_WEATHER_PREFERENCES[event_type]
+    temp = weather_data['temperature']
+    wind = weather_data['wind_speed']
+    precip = weather_data['precipitation']
+    humidity = weather_data.get('humidity', 50)  # Default if not available
+    description = weather_data['description'].lower()
+    
+    score = 0
+    details = {}
+    
+    # Convert wind from m/s to km/h for scoring
+    wind_kmh = wind * 3.6
+    
+    if event_type == 'sports':
+        # Sports Event Scoring
+        # Temperature scoring
+        temp_config = prefs['scoring']['temperature']
+        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
+            temp_points = temp_config['max_points']
+            temp_status = 'Ideal'
+        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
+            temp_points = temp_config['acceptable_points']
+            temp_status = 'Acceptable'
+        else:
+            temp_points = 0
+            temp_status = 'Poor'
+        
+        score += temp_points
+        details['temperature'] = {
+            'value': temp,
+            'points': temp_points,
+            'status': temp_status
+        }
+        
+        # Precipitation scoring (convert mm to percentage chance)
+        precip_chance = min(precip * 100, 100)  # Convert mm to percentage
+        precip_config = prefs['scoring']['precipitation']
+        if precip_chance <= precip_config['ideal_max']:
+            precip_points = precip_config['max_points']
+            precip_status = 'Ideal'
+        elif precip_chance <= precip_config['acceptable_max']:
+            precip_points = precip_config['acceptable_points']
+            precip_status = 'Acceptable'
+        else:
+            precip_points = 0
+            precip_status = 'Poor'
+        
+        score += precip_points
+        details['precipitation'] = {
+            'value': precip,
+            'points': precip_points,
+            'status': precip_status
+        }
+        
+        # Wind scoring
+        wind_config = prefs['scoring']['wind']
+        if wind_kmh <= wind_config['ideal_max']:
+            wind_points = wind_config['max_points']
+            wind_status = 'Ideal'
+        elif wind_kmh <= wind_config['acceptable_max']:
+            wind_points = wind_config['acceptable_points']
+            wind_status = 'Acceptable'
+        else:
+            wind_points = 0
+            wind_status = 'Poor'
+        
+        score += wind_points
+        details['wind'] = {
+            'value': wind,
+            'points': wind_points,
+            'status': wind_status
+        }
+        
+        # Conditions scoring
+        conditions_config = prefs['scoring']['conditions']
+        conditions_points = 0
+        conditions_status = 'Poor'
+        
+        for condition, points in conditions_config['scores'].items():
+            if condition in description:
+                conditions_points = points
+                conditions_status = condition.title()
+                break
+        
+        score += conditions_points
+        details['conditions'] = {
+            'value': description,
+            'points': conditions_points,
+            'status': conditions_status
+        }
+        
+    elif event_type == 'formal':
+        # Formal Event Scoring
+        # Precipitation scoring (highest priority)
+        precip_chance = min(precip * 100, 100)
+        precip_config = prefs['scoring']['precipitation']
+        if precip_chance <= precip_config['ideal_max']:
+            precip_points = precip_config['max_points']
+            precip_status = 'Ideal'
+        elif precip_chance <= precip_config['acceptable_max']:
+            precip_points = precip_config['acceptable_points']
+            precip_status = 'Acceptable'
+        else:
+            precip_points = 0
+            precip_status = 'Poor'
+        
+        score += precip_points
+        details['precipitation'] = {
+            'value': precip,
+            'points': precip_points,
+            'status': precip_status
+        }
+        
+        # Temperature scoring
+        temp_config = prefs['scoring']['temperature']
+        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
+            temp_points = temp_config['max_points']
+            temp_status = 'Ideal'
+        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
+            temp_points = temp_config['acceptable_points']
+            temp_status = 'Acceptable'
+        else:
+            temp_points = 0
+            temp_status = 'Poor'
+        
+        score += temp_points
+        details['temperature'] = {
+            'value': temp,
+            'points': temp_points,
+            'status': temp_status
+        }
+        
+        # Humidity scoring
+        humidity_config = prefs['scoring']['humidity']
+        if humidity_config['ideal_range'][0] <= humidity <= humidity_config['ideal_range'][1]:
+            humidity_points = humidity_config['max_points']
+            humidity_status = 'Ideal'
+        elif humidity_config['acceptable_range'][0] <= humidity <= humidity_config['acceptable_range'][1]:
+            humidity_points = humidity_config['acceptable_points']
+            humidity_status = 'Acceptable'
+        else:
+            humidity_points = 0
+            humidity_status = 'Poor'
+        
+        score += humidity_points
+        details['humidity'] = {
+            'value': humidity,
+            'points': humidity_points,
+            'status': humidity_status
+        }
+        
+        # Wind scoring
+        wind_config = prefs['scoring']['wind']
+        if wind_kmh <= wind_config['ideal_max']:
+            wind_points = wind_config['max_points']
+            wind_status = 'Ideal'
+        elif wind_kmh <= wind_config['acceptable_max']:
+            wind_points = wind_config['acceptable_points']
+            wind_status = 'Acceptable'
+        else:
+            wind_points = 0
+            wind_status = 'Poor'
+        
+        score += wind_points
+        details['wind'] = {
+            'value': wind,
+            'points': wind_points,
+            'status': wind_status
+        }
+        
+    elif event_type == 'adventure':
+        # Outdoor Adventure Scoring
+        # Temperature scoring
+        temp_config = prefs['scoring']['temperature']
+        if temp_config['ideal_range'][0] <= temp <= temp_config['ideal_range'][1]:
+            temp_points = temp_config['max_points']
+            temp_status = 'Ideal'
+        elif temp_config['acceptable_range'][0] <= temp <= temp_config['acceptable_range'][1]:
+            temp_points = temp_config['acceptable_points']
+            temp_status = 'Acceptable'
+        else:
+            temp_points = 0
+            temp_status = 'Poor'
+        
+        score += temp_points
+        details['temperature'] = {
+            'value': temp,
+            'points': temp_points,
+            'status': temp_status
+        }
+        
+        # Precipitation scoring
+        precip_chance = min(precip * 100, 100)
+        precip_config = prefs['scoring']['precipitation']
+        if precip_chance <= precip_config['ideal_max']:
+            precip_points = precip_config['max_points']
+            precip_status = 'Ideal'
+        elif precip_chance <= precip_config['acceptable_max']:
+            precip_points = precip_config['acceptable_points']
+            precip_status = 'Acceptable'
+        else:
+            precip_points = 0
+            precip_status = 'Poor'
+        
+        score += precip_points
+        details['precipitation'] = {
+            'value': precip,
+            'points': precip_points,
+            'status': precip_status
+        }
+        
+        # Visibility scoring (estimated from weather conditions)
+        visibility = 10  # Default good visibility
+        if 'fog' in description or 'mist' in description:
+            visibility = 2
+        elif 'haze' in description:
+            visibility = 5
+        elif 'rain' in description or 'snow' in description:
+            visibility = 7
+        
+        visibility_config = prefs['scoring']['visibility']
+        if visibility >= visibility_config['ideal_min']:
+            visibility_points = visibility_config['max_points']
+            visibility_status = 'Ideal'
+        elif visibility >= visibility_config['acceptable_min']:
+            visibility_points = visibility_config['acceptable_points']
+            visibility_status = 'Acceptable'
+        else:
+            visibility_points = 0
+            visibility_status = 'Poor'
+        
+        score += visibility_points
+        details['visibility'] = {
+            'value': visibility,
+            'points': visibility_points,
+            'status': visibility_status
+        }
+        
+        # Wind scoring
+        wind_config = prefs['scoring']['wind']
+        if wind_config['ideal_range'][0] <= wind_kmh <= wind_config['ideal_range'][1]:
+            wind_points = wind_config['max_points']
+            wind_status = 'Ideal'
+        elif wind_config['acceptable_range'][0] <= wind_kmh <= wind_config['acceptable_range'][1]:
+            wind_points = wind_config['acceptable_points']
+            wind_status = 'Acceptable'
+        else:
+            wind_points = 0
+            wind_status = 'Poor'
+        
+        score += wind_points
+        details['wind'] = {
+            'value': wind,
+            'points': wind_points,
+            'status': wind_status
+        }
+        
+    elif event_type == 'picnic':
+        # Family/Friends Picnic Scoring
+        # Comfort scoring (temperature + humidity consideration)
+        comfort_config = prefs['scoring']['comfort']
+        if comfort_config['ideal_range'][0] <= temp <= comfort_config['ideal_range'][1]:
+            comfort_points = comfort_config['max_points']
+            comfort_status = 'Ideal'
+        elif comfort_config['acceptable_range'][0] <= temp <= comfort_config['acceptable_range'][1]:
+            comfort_points = comfort_config['acceptable_points']
+            comfort_status = 'Acceptable'
+        else:
+            comfort_points = 0
+            comfort_status = 'Poor'
+        
+        score += comfort_points
+        details['comfort'] = {
+            'value': temp,
+            'points': comfort_points,
+            'status': comfort_status
+        }
+        
+        # Precipitation scoring
+        precip_chance = min(precip * 100, 100)
+        precip_config = prefs['scoring']['precipitation']
+        if precip_chance <= precip_config['ideal_max']:
+            precip_points = precip_config['max_points']
+            precip_status = 'Ideal'
+        elif precip_chance <= precip_config['acceptable_max']:
+            precip_points = precip_config['acceptable_points']
+            precip_status = 'Acceptable'
+        else:
+            precip_points = 0
+            precip_status = 'Poor'
+        
+        score += precip_points
+        details['precipitation'] = {
+            'value': precip,
+            'points': precip_points,
+            'status': precip_status
+        }
+        
+        # UV Index scoring (estimated from weather conditions)
+        uv_index = 3  # Default moderate UV
+        if 'clear' in description and 'sunny' in description:
+            uv_index = 7
+        elif 'clear' in description:
+            uv_index = 5
+        elif 'cloudy' in description or 'overcast' in description:
+            uv_index = 2
+        
+        uv_config = prefs['scoring']['uv_index']
+        if uv_index <= uv_config['ideal_max']:
+            uv_points = uv_config['max_points']
+            uv_status = 'Ideal'
+        elif uv_index <= uv_config['acceptable_max']:
+            uv_points = uv_config['acceptable_points']
+            uv_status = 'Acceptable'
+        else:
+            uv_points = uv_config['high_points']
+            uv_status = 'High'
+        
+        score += uv_points
+        details['uv_index'] = {
+            'value': uv_index,
+            'points': uv_points,
+            'status': uv_status
+        }
+        
+        # Wind scoring
+        wind_config = prefs['scoring']['wind']
+        if wind_config['ideal_range'][0] <= wind_kmh <= wind_config['ideal_range'][1]:
+            wind_points = wind_config['max_points']
+            wind_status = 'Ideal'
+        elif wind_config['acceptable_range'][0] <= wind_kmh <= wind_config['acceptable_range'][1]:
+            wind_points = wind_config['acceptable_points']
+            wind_status = 'Acceptable'
+        else:
+            wind_points = 0
+            wind_status = 'Poor'
+        
+        score += wind_points
+        details['wind'] = {
+            'value': wind,
+            'points': wind_points,
+            'status': wind_status
+        }
+    
+    # Convert score to rating
+    max_score = prefs['total_max_score']
+    percentage = (score / max_score) * 100
+    
+    if percentage >= 85:
+        rating = "Good"
+    elif percentage >= 65:
+        rating = "Okay"
+    else:
+        rating = "Poor"
+    
+    return {
+        "score": score,
+        "max_score": max_score,
+        "percentage": round(percentage, 1),
+        "rating": rating,
+        "details": details
+    }
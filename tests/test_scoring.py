@@ -0,0 +1,220 @@
+"""Regression suite for the compiled and batch suitability scorers
+
+calculate_suitability_score must keep producing exactly what the original
+per-event-type branches did (score, max_score, percentage, rating and
+details, including key order), and score_weather_batch must agree with it
+row for row.
+"""
+import itertools
+import random
+import unittest
+
+import numpy as np
+
+import app
+from tests.legacy_scoring import legacy_suitability_score
+
+LEGACY_EVENT_TYPES = ('sports', 'formal', 'adventure', 'picnic')
+
+# Descriptions covering every condition keyword and visibility/UV estimate
+DESCRIPTIONS = [
+    'clear sky', 'Clear and sunny', 'few clouds', 'partly cloudy', 'scattered clouds',
+    'overcast clouds', 'mist', 'fog', 'haze', 'light rain', 'heavy rain', 'moderate rain',
+    'light snow', 'thunderstorm', 'thunderstorm with heavy rain', 'tornado'
+]
+
+# Which weather field a factor's thresholds are compared against, and how
+# a threshold converts back into that field's units
+FACTOR_FIELDS = {
+    'temperature': ('temperature', 1),
+    'comfort': ('temperature', 1),
+    'humidity': ('humidity', 1),
+    'wind': ('wind_speed', 1 / 3.6),  # Thresholds are km/h
+    'precipitation': ('precipitation', 1 / 100),  # Thresholds are percentage chance
+}
+
+BASE_VALUES = {
+    'temperature': [-5.0, 22.0, 40.0],
+    'humidity': [50],
+    'wind_speed': [0.0, 3.0],
+    'precipitation': [0.0, 0.5],
+}
+
+
+def band_edges(event_type):
+    """Each weather field's values at, just below and just above every band edge"""
+    values = {field: set(base) for field, base in BASE_VALUES.items()}
+    for factor, config in app.EVENT_WEATHER_PREFERENCES[event_type]['scoring'].items():
+        if factor not in FACTOR_FIELDS:
+            continue
+        field, scale = FACTOR_FIELDS[factor]
+        thresholds = []
+        for key in ('ideal_range', 'acceptable_range'):
+            thresholds.extend(config.get(key, ()))
+        for key in ('ideal_max', 'acceptable_max', 'ideal_min', 'acceptable_min'):
+            if key in config:
+                thresholds.append(config[key])
+        for threshold in thresholds:
+            edge = threshold * scale
+            step = 1 if field == 'humidity' else 0.01 if field == 'precipitation' else 0.1
+            values[field].update((edge - step, edge, edge + step))
+    return {field: sorted(field_values) for field, field_values in values.items()}
+
+
+def edge_observations(event_type):
+    """Every combination of band edges and descriptions for one event type"""
+    edges = band_edges(event_type)
+    for temperature, humidity, wind_speed, precipitation, description in itertools.product(
+        edges['temperature'], edges['humidity'], edges['wind_speed'], edges['precipitation'], DESCRIPTIONS
+    ):
+        yield {
+            'temperature': temperature,
+            'humidity': humidity,
+            'wind_speed': wind_speed,
+            'precipitation': precipitation,
+            'description': description,
+            'icon': '01d'
+        }
+
+
+def random_observations(count, seed=2024):
+    """Observations shaped like parsed forecasts, with the usual rounding"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        observation = {
+            'temperature': round(rng.uniform(-10, 45), 1),
+            'wind_speed': round(rng.uniform(0, 15), 1),
+            'precipitation': round(rng.choice([0.0, rng.uniform(0, 3)]), 1),
+            'description': rng.choice(DESCRIPTIONS),
+            'icon': '01d'
+        }
+        if rng.random() < 0.9:
+            observation['humidity'] = rng.randint(0, 100)
+        yield observation
+
+
+def as_columns(observations):
+    """Turn a list of observations into the column mapping score_weather_batch takes
+
+    The humidity column is left out when no observation has one, so the
+    batch default is exercised; otherwise missing rows get the same 50.
+    """
+    columns = {
+        field: [observation[field] for observation in observations]
+        for field in ('temperature', 'wind_speed', 'precipitation', 'description')
+    }
+    if any('humidity' in observation for observation in observations):
+        columns['humidity'] = [observation.get('humidity', 50) for observation in observations]
+    return columns
+
+
+class CalculateSuitabilityScoreTest(unittest.TestCase):
+    """calculate_suitability_score against the frozen per-type implementation"""
+    
+    def assert_matches_legacy(self, event_type, observation):
+        expected = legacy_suitability_score(event_type, observation)
+        actual = app.calculate_suitability_score(event_type, observation)
+        self.assertEqual(actual, expected, (event_type, observation))
+        self.assertEqual(list(actual), list(expected))
+        self.assertEqual(list(actual['details']), list(expected['details']))
+        for factor, detail in expected['details'].items():
+            self.assertEqual(list(actual['details'][factor]), list(detail))
+            self.assertIs(type(actual['details'][factor]['points']), type(detail['points']))
+    
+    def test_band_edges(self):
+        for event_type in LEGACY_EVENT_TYPES:
+            for observation in edge_observations(event_type):
+                self.assert_matches_legacy(event_type, observation)
+    
+    def test_random_observations(self):
+        for observation in random_observations(5000):
+            for event_type in LEGACY_EVENT_TYPES:
+                self.assert_matches_legacy(event_type, observation)
+    
+    def test_missing_humidity_defaults_to_50(self):
+        observation = {'temperature': 22.0, 'wind_speed': 2.0, 'precipitation': 0.0, 'description': 'clear sky'}
+        self.assertEqual(
+            app.calculate_suitability_score('formal', observation),
+            app.calculate_suitability_score('formal', {**observation, 'humidity': 50})
+        )
+        self.assert_matches_legacy('formal', observation)
+    
+    def test_unknown_event_type_and_missing_weather(self):
+        observation = {'temperature': 22.0, 'wind_speed': 2.0, 'precipitation': 0.0, 'description': 'clear sky'}
+        for event_type, weather_data in (('concert', observation), ('sports', None), ('sports', {})):
+            self.assertEqual(
+                app.calculate_suitability_score(event_type, weather_data),
+                legacy_suitability_score(event_type, weather_data)
+            )
+    
+    def test_pinned_outputs(self):
+        observation = {
+            'temperature': 22.0, 'humidity': 55, 'wind_speed': 3.0, 'precipitation': 0.0,
+            'description': 'clear sky', 'icon': '01d'
+        }
+        self.assertEqual(app.calculate_suitability_score('sports', observation), {
+            'score': 100,
+            'max_score': 100,
+            'percentage': 100.0,
+            'rating': 'Good',
+            'details': {
+                'temperature': {'value': 22.0, 'points': 30, 'status': 'Ideal'},
+                'precipitation': {'value': 0.0, 'points': 30, 'status': 'Ideal'},
+                'wind': {'value': 3.0, 'points': 25, 'status': 'Ideal'},
+                'conditions': {'value': 'clear sky', 'points': 15, 'status': 'Clear'}
+            }
+        })
+        self.assertEqual(app.calculate_suitability_score('picnic', {**observation, 'precipitation': 0.1}), {
+            'score': 80,
+            'max_score': 100,
+            'percentage': 80.0,
+            'rating': 'Okay',
+            'details': {
+                'comfort': {'value': 22.0, 'points': 40, 'status': 'Ideal'},
+                'precipitation': {'value': 0.1, 'points': 15, 'status': 'Acceptable'},
+                'uv_index': {'value': 5, 'points': 15, 'status': 'Acceptable'},
+                'wind': {'value': 3.0, 'points': 10, 'status': 'Ideal'}
+            }
+        })
+
+
+class ScoreWeatherBatchTest(unittest.TestCase):
+    """score_weather_batch against calculate_suitability_score, row for row"""
+    
+    def assert_batch_matches(self, event_type, observations):
+        batch = app.score_weather_batch(event_type, as_columns(observations))
+        for row, observation in enumerate(observations):
+            expected = app.calculate_suitability_score(event_type, observation)
+            context = (event_type, observation)
+            self.assertEqual(int(batch['score'][row]), expected['score'], context)
+            self.assertEqual(batch['rating'][row], expected['rating'], context)
+            if 'percentage' in expected:
+                self.assertEqual(float(batch['percentage'][row]), expected['percentage'], context)
+            for factor, detail in expected['details'].items():
+                self.assertEqual(int(batch['points'][factor][row]), detail['points'], (factor, context))
+    
+    def test_band_edges(self):
+        for event_type in LEGACY_EVENT_TYPES:
+            self.assert_batch_matches(event_type, list(edge_observations(event_type)))
+    
+    def test_random_observations(self):
+        observations = list(random_observations(5000))
+        for event_type in LEGACY_EVENT_TYPES:
+            self.assert_batch_matches(event_type, observations)
+            self.assert_batch_matches(
+                event_type, [{k: v for k, v in observation.items() if k != 'humidity'} for observation in observations]
+            )
+    
+    def test_unknown_event_type(self):
+        batch = app.score_weather_batch('concert', as_columns(list(random_observations(10))))
+        self.assertTrue(np.all(batch['score'] == 0))
+        self.assertEqual(list(batch['rating']), ['Poor'] * 10)
+        self.assertEqual(batch['points'], {})
+    
+    def test_empty_batch(self):
+        batch = app.score_weather_batch('sports', as_columns([]))
+        self.assertEqual(len(batch['score']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()